@@ -0,0 +1,46 @@
+"""Verify time per password hash scheme and cost.
+
+    python benchmarks/password_hash.py --iterations 20 bcrypt:4 bcrypt:10 bcrypt:12 argon2
+
+Each target is 'scheme' or 'scheme:rounds'. Schemes whose backend is not
+installed (e.g. argon2 without argon2-cffi) are reported and skipped.
+"""
+import argparse
+import statistics
+import time
+
+from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
+
+
+def bench(target: str, iterations: int):
+    scheme, _, rounds = target.partition(":")
+    options = {f"{scheme}__rounds": int(rounds)} if rounds else {}
+    context = CryptContext(schemes=[scheme], **options)
+    hashed = context.hash("correct horse battery staple")
+
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        context.verify("correct horse battery staple", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=["bcrypt:4", "bcrypt:12"])
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    for target in args.targets:
+        try:
+            median, worst = bench(target, args.iterations)
+        except MissingBackendError as err:
+            print(f"{target:>12}: skipped ({err})")
+            continue
+        print(f"{target:>12}: verify median {median:8.1f}ms  max {worst:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""p99 latency of fast requests while slow, blocking requests run concurrently.
+
+Compares a blocking handler declared 'async def' (runs on the event loop, the
+way the endpoints used to be) with the same handler declared 'def' (runs in
+the threadpool, the way they are now).
+
+Requests arrive at a fixed rate and latency is measured from the scheduled
+arrival, so time spent waiting on a stalled event loop is counted.
+
+    python benchmarks/threadpool.py --slow-ms 50 --requests 400 --interval-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import anyio
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+
+def make_app(slow_ms: float, threadpool_workers: int) -> FastAPI:
+    app = FastAPI()
+
+    def blocking_query():
+        # stands in for a slow synchronous SQLAlchemy query or bcrypt hash
+        time.sleep(slow_ms / 1000)
+
+    @app.on_event("startup")
+    async def limit_threadpool():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = threadpool_workers
+
+    @app.get("/inline/slow")
+    async def inline_slow():
+        blocking_query()
+
+    @app.get("/inline/fast")
+    async def inline_fast():
+        return {}
+
+    @app.get("/threadpool/slow")
+    def threadpool_slow():
+        blocking_query()
+
+    @app.get("/threadpool/fast")
+    def threadpool_fast():
+        return {}
+
+    return app
+
+
+async def run(app: FastAPI, mode: str, requests: int, interval_ms: float):
+    latencies = []
+
+    async def request(client: AsyncClient, i: int, start: float):
+        # every fourth request is slow, only the fast ones are measured
+        url = f"/{mode}/slow" if i % 4 == 0 else f"/{mode}/fast"
+        arrival = start + i * interval_ms / 1000
+        await asyncio.sleep(max(0, arrival - time.perf_counter()))
+        await client.get(url)
+        if i % 4:
+            latencies.append((time.perf_counter() - arrival) * 1000)
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        await app.router.startup()
+        start = time.perf_counter()
+        await asyncio.gather(*(request(client, i, start) for i in range(requests)))
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slow-ms", type=float, default=50)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=40)
+    args = parser.parse_args()
+
+    app = make_app(args.slow_ms, args.workers)
+    for mode in ["inline", "threadpool"]:
+        p50, p99 = asyncio.run(run(app, mode, args.requests, args.interval_ms))
+        print(f"{mode:>10}: fast requests p50 {p50:8.1f}ms  p99 {p99:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
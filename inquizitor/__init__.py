@@ -1,24 +1,45 @@
-from fastapi import Depends, FastAPI, Request
-from fastapi.responses import JSONResponse
+import anyio
+import asyncio
+import logging
+import secrets
+
+from typing import Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_jwt_auth import AuthJWT
 from fastapi_jwt_auth.exceptions import AuthJWTException
 from sqlmodel import Session
 
-from inquizitor import commands
-from inquizitor.models import RevokedToken
-from inquizitor.db.session import SessionLocal
+from inquizitor import commands, crud
+from inquizitor.api import deps
+from inquizitor.db.session import SessionLocal, engine
+from inquizitor.core.autosave import AnswerBufferFull, answer_buffer
 from inquizitor.core.config import settings
+from inquizitor.core.denylist import denylist
+from inquizitor.core.idempotency import IdempotencyMiddleware
+from inquizitor.core.metrics import CallbackMetric, MetricsMiddleware, registry
+from inquizitor.core.profiling import ProfilingMiddleware
+from inquizitor.core.querystats import QueryStatsMiddleware, instrument
+from inquizitor.core.slowqueries import add_file_handler, slow_query_log
+from inquizitor.core.security import PasswordHasherBusy, hasher
 from inquizitor.api.api_v1.api import api_router
 
+logger = logging.getLogger(__name__)
+
 
 def register_commands():
     """Register Click commands."""
     commands.cli.add_command(commands.initial_data)
     commands.cli.add_command(commands.test)
+    commands.cli.add_command(commands.regrade)
+    commands.cli.add_command(commands.check_scores)
+    commands.cli.add_command(commands.purge_tokens)
 
 
-def register_fastapi_jwt_auth(app: FastAPI, db: Session):
+def register_fastapi_jwt_auth(app: FastAPI, db: Optional[Session] = None):
     # TODO: do we test exception handlers?
     @AuthJWT.load_config
     def get_config():
@@ -30,16 +51,220 @@ def register_fastapi_jwt_auth(app: FastAPI, db: Session):
             status_code=exc.status_code, content={"detail": exc.message}
         )
 
+    # NOTE: reference used Redis instead of an SQL DB
+    # revoked tokens are stored in the db and mirrored in memory, tokens missing
+    # from memory are looked up in the db (see crud.token.is_revoked)
+    @app.on_event("startup")
+    def load_denylist():
+        if db is not None:
+            crud.token.load_denylist(db)
+            return
+        with SessionLocal() as session:
+            crud.token.load_denylist(session)
+
     @AuthJWT.token_in_denylist_loader
     def check_if_token_in_denylist(decrypted_token):
-        # NOTE: reference used Redis instead of an SQL DB
-        # config below might produce errors in production
-        # NOTE: tokens in denylist (in db) has no expiry,
-        # will add in the future if time permits
+        if db is not None:
+            return crud.token.is_revoked(db, jti=decrypted_token["jti"])
+        with SessionLocal() as session:
+            return crud.token.is_revoked(session, jti=decrypted_token["jti"])
+
+
+def register_token_purge(app: FastAPI):
+    if not settings.TOKEN_PURGE_INTERVAL_MINUTES:
+        return
+
+    async def purge_periodically():
+        while True:
+            await asyncio.sleep(settings.TOKEN_PURGE_INTERVAL_MINUTES * 60)
+            try:
+                await run_in_threadpool(commands.tokens.purge_expired_tokens)
+            except Exception:
+                logger.exception("Purging expired revoked tokens failed")
+
+    @app.on_event("startup")
+    def start_token_purge():
+        app.state.token_purge = asyncio.get_event_loop().create_task(
+            purge_periodically()
+        )
+
+    @app.on_event("shutdown")
+    def stop_token_purge():
+        app.state.token_purge.cancel()
+
+
+def register_threadpool(app: FastAPI):
+    # endpoints are plain 'def' so the blocking db and bcrypt calls
+    # run in anyio's worker threads instead of on the event loop
+    @app.on_event("startup")
+    async def limit_threadpool():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = settings.THREADPOOL_MAX_WORKERS
+
+
+def register_password_hasher(app: FastAPI):
+    @app.exception_handler(PasswordHasherBusy)
+    def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Too many logins at once, try again shortly"},
+            headers={"Retry-After": "1"},
+        )
+
+    @app.on_event("shutdown")
+    def stop_password_hasher():
+        hasher.shutdown()
+
+
+def register_answer_autosave(app: FastAPI):
+    @app.exception_handler(AnswerBufferFull)
+    def answer_buffer_full_handler(request: Request, exc: AnswerBufferFull):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Too many answers at once, try again shortly"},
+            headers={"Retry-After": "1"},
+        )
+
+    if not settings.ANSWER_AUTOSAVE:
+        return
+
+    @app.on_event("startup")
+    def start_answer_autosave():
+        answer_buffer.start(SessionLocal)
+
+    @app.on_event("shutdown")
+    def stop_answer_autosave():
+        answer_buffer.stop()
+
+
+def register_idempotency(app: FastAPI):
+    app.add_middleware(
+        IdempotencyMiddleware,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    )
+
+
+def register_query_stats(app: FastAPI, db: Optional[Session] = None):
+    instrument(db.get_bind() if db is not None else engine)
+    app.add_middleware(
+        QueryStatsMiddleware, repeat_threshold=settings.QUERY_REPEAT_THRESHOLD
+    )
+
+
+def register_slow_query_log(db: Optional[Session] = None):
+    if not settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    add_file_handler(
+        settings.SLOW_QUERY_LOG_FILE,
+        max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backups=settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+    slow_query_log.instrument(db.get_bind() if db is not None else engine)
+
+
+def register_metrics(app: FastAPI, db: Optional[Session] = None):
+    if not settings.METRICS_ENABLED:
+        return
+
+    pool = (db.get_bind() if db is not None else engine).pool
+    # only QueuePool (i.e. PostgreSQL) keeps these
+    if hasattr(pool, "checkedout"):
+        registry.register(
+            CallbackMetric("db_pool_checked_out", "Connections in use", pool.checkedout)
+        )
+        registry.register(
+            CallbackMetric(
+                "db_pool_overflow",
+                "Connections open beyond the pool size",
+                lambda: max(pool.overflow(), 0),
+            )
+        )
+        registry.register(CallbackMetric("db_pool_size", "Pool size", pool.size))
+    registry.register(
+        CallbackMetric(
+            "password_hash_in_use",
+            "Password hashes running or waiting for a worker",
+            lambda: hasher.in_use,
+        )
+    )
+    registry.register(
+        CallbackMetric(
+            "password_hash_queued",
+            "Password hashes waiting for a worker",
+            lambda: hasher.queued,
+        )
+    )
+    registry.register(
+        CallbackMetric(
+            "password_hash_rejected_total",
+            "Password hashes turned away with a 503",
+            lambda: hasher.rejected,
+            type="counter",
+        )
+    )
+    registry.register(
+        CallbackMetric(
+            "token_denylist_lookups_total",
+            "Revoked token lookups",
+            lambda: {("hit",): denylist.hits, ("miss",): denylist.misses},
+            type="counter",
+            labelnames=["result"],
+        )
+    )
+    registry.register(
+        CallbackMetric("token_denylist_size", "Revoked tokens held", denylist.__len__)
+    )
+    registry.register(
+        CallbackMetric(
+            "answer_autosave_pending",
+            "Answers buffered for writing",
+            answer_buffer.__len__,
+        )
+    )
 
-        jti = decrypted_token["jti"]
-        entry = db.query(RevokedToken).filter(RevokedToken.jti == jti).first()
-        return entry
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics(request: Request):
+        if settings.METRICS_TOKEN and not secrets.compare_digest(
+            request.headers.get("authorization", "").encode("latin-1"),
+            f"Bearer {settings.METRICS_TOKEN}".encode(),
+        ):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
+
+def register_profiling(app: FastAPI, db: Optional[Session] = None):
+    if not settings.PROFILING_ENABLED:
+        return
+
+    def is_superuser(request: Request) -> bool:
+        session = db if db is not None else SessionLocal()
+        try:
+            user = deps.get_current_user(session, AuthJWT(req=request))
+            deps.get_current_superuser(user)
+        except (AuthJWTException, HTTPException):
+            return False
+        finally:
+            if db is None:
+                session.close()
+        return True
+
+    async def authorize(request: Request) -> bool:
+        # without a token there is no user to look up
+        if not request.cookies.get(settings.authjwt_access_cookie_key):
+            return False
+        return await run_in_threadpool(is_superuser, request)
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        authorize=authorize,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+        limit=settings.PROFILING_TOP,
+    )
 
 
 def register_cors(app: FastAPI):
@@ -57,7 +282,7 @@ def register_cors(app: FastAPI):
     )
 
 
-def create_app(db: Session = SessionLocal()):
+def create_app(db: Optional[Session] = None):
     """App for getting training data from exams"""
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -69,7 +294,16 @@ def create_app(db: Session = SessionLocal()):
     app.include_router(api_router)
 
     register_commands()
+    register_idempotency(app)
+    register_query_stats(app, db)
+    register_slow_query_log(db)
+    register_metrics(app, db)
+    register_profiling(app, db)
     register_cors(app)
     register_fastapi_jwt_auth(app, db)
+    register_token_purge(app)
+    register_threadpool(app)
+    register_password_hasher(app)
+    register_answer_autosave(app)
 
     return app
@@ -21,7 +21,7 @@ router = APIRouter()
 
 
 @router.post("/token")
-async def login_access_token(
+def login_access_token(
     db: Session = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
     Authorize: AuthJWT = Depends(),
@@ -52,7 +52,7 @@ async def login_access_token(
 
 
 @router.post("/logout", response_model=models.Msg)
-async def logout(
+def logout(
     Authorize: AuthJWT = Depends(), db: Session = Depends(deps.get_db)
 ) -> Any:
     """
@@ -71,7 +71,7 @@ async def logout(
 
 
 @router.post("/refresh", response_model=models.Msg)
-async def refresh(Authorize: AuthJWT = Depends()) -> Any:
+def refresh(Authorize: AuthJWT = Depends()) -> Any:
     """
     Get an access token using a refresh token
     """
@@ -91,7 +91,7 @@ async def refresh(Authorize: AuthJWT = Depends()) -> Any:
 
 
 @router.delete("/access-revoke", response_model=models.Msg)
-async def revoke_access(
+def revoke_access(
     Authorize: AuthJWT = Depends(), db: Session = Depends(deps.get_db)
 ) -> Any:
     """
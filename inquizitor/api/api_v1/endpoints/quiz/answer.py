@@ -6,31 +6,33 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from inquizitor import crud, models
 from inquizitor.api import deps
+from inquizitor.core.autosave import answer_buffer
+from inquizitor.core.config import settings
 
 router = APIRouter()
 
 
 @router.get("/{quiz_index}/finish", response_model=int)
-async def finish_quiz(
+def finish_quiz(
     *,
     db: Session = Depends(deps.get_db),
     attempt: models.QuizAttempt = Depends(deps.get_attempt),
-    current_student: models.User = Depends(deps.get_current_student)
+    current_student: models.UserSnapshot = Depends(deps.get_current_student)
 ) -> Any:
     """
     Finish the quiz and get the score for this attempt.
     """
 
-    attempt_in = models.QuizAttemptUpdate(is_done=True)
-    attempt = crud.quiz_attempt.update(db, db_obj=attempt, obj_in=attempt_in)
+    answer_buffer.flush(db, attempt_id=attempt.id)
+    attempt = crud.quiz_attempt.finish(db, db_obj=attempt)
 
-    return crud.quiz_attempt.get_score(db, id=attempt.id)
+    return attempt.score
 
 
 @router.put(
     "/{quiz_index}/questions/{question_id}/answer", response_model=models.QuizAnswer
 )
-async def update_answer(
+def update_answer(
     *,
     db: Session = Depends(deps.get_db),
     attempt_and_link: Tuple[models.QuizAttempt, models.QuizStudentLink] = Depends(
@@ -38,36 +40,91 @@ async def update_answer(
     ),
     question: models.QuizQuestion = Depends(deps.get_question),
     answer_in: Union[models.QuizAnswerCreate, models.QuizAnswerUpdate],
-    current_student: models.User = Depends(deps.get_current_student)
+    current_student: models.UserSnapshot = Depends(deps.get_current_student)
 ) -> Any:
     """
     Update answer for the given question.
+
+    A complete answer (content, student and choice) is created or replaces the
+    existing one. A partial answer only updates an existing answer, without one
+    it is a 404.
     """
 
     attempt = attempt_and_link[0]
     answer_in.attempt_id = attempt.id
+    answer_in.question_id = question.id
+
+    # grade() uses the points of the choice's own question, not this one
+    choice = None
+    if answer_in.choice_id:
+        choice = crud.quiz_choice.get_by_question(
+            db, id=answer_in.choice_id, question_id=question.id
+        )
+        if not choice:
+            raise HTTPException(
+                status_code=404,
+                detail="Choice does not belong to the specified question",
+            )
+
+    if settings.ANSWER_AUTOSAVE and choice:
+        answer_buffer.put(attempt=attempt, question_id=question.id, choice_id=choice.id)
+        # not written yet, so it has no id
+        return models.QuizAnswer(
+            content=choice.content,
+            is_correct=choice.is_correct,
+            student_id=attempt.student_id,
+            choice_id=choice.id,
+            attempt_id=attempt.id,
+            question_id=question.id,
+        )
+
+    if settings.ANSWER_AUTOSAVE:
+        # an older buffered click must not overwrite this write when flushed
+        answer_buffer.flush(db, attempt_id=attempt.id)
 
+    if isinstance(answer_in, models.QuizAnswerCreate):
+        return crud.quiz_answer.upsert(db, obj_in=answer_in)
+
+    # partial update, only possible for an existing answer
     answer = crud.quiz_answer.get_by_question_and_attempt_ids(
         db, question_id=question.id, attempt_id=attempt.id
     )
-    if answer:
-        answer = crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
-    else:
-        answer = crud.quiz_answer.create(db, obj_in=answer_in)
+    if not answer:
+        raise HTTPException(status_code=404, detail="Answer not found")
+    return crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
+
 
-    return answer
+@router.put("/{quiz_index}/answers", response_model=List[models.QuizAnswerBatchResult])
+def update_answers(
+    *,
+    db: Session = Depends(deps.get_db),
+    attempt_and_link: Tuple[models.QuizAttempt, models.QuizStudentLink] = Depends(
+        deps.get_open_attempt_and_link
+    ),
+    answers_in: List[models.QuizAnswerBatchItem],
+    current_student: models.UserSnapshot = Depends(deps.get_current_student)
+) -> Any:
+    """
+    Update answers for a page of questions at once, with a status for each.
+    """
+
+    attempt = attempt_and_link[0]
+    if settings.ANSWER_AUTOSAVE:
+        # an older buffered click must not overwrite these writes when flushed
+        answer_buffer.flush(db, attempt_id=attempt.id)
+    return crud.quiz_answer.upsert_multi(db, attempt=attempt, items=answers_in)
 
 
 @router.get("/{quiz_index}/results", response_model=List[models.QuizReadWithQuestions])
-async def get_quiz_results(
+def get_quiz_results(
     *,
     db: Session = Depends(deps.get_db),
     quiz: models.Quiz = Depends(deps.get_quiz),
-    current_author: models.User = Depends(deps.get_current_author)
+    current_author: models.UserSnapshot = Depends(deps.get_current_author)
 ) -> Any:
     """
     Get latest attempts of participants for this quiz
     """
 
-    results = crud.quiz.get_multi_results_by_quiz_id(db, id=quiz.id)
-    return results
+    answer_buffer.flush(db, quiz_id=quiz.id)
+    return crud.quiz.get_multi_results_by_quiz_id(db, id=quiz.id)
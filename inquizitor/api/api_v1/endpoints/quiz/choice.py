@@ -13,12 +13,12 @@ router = APIRouter()
 
 
 @router.post("/{quiz_index}/questions/{question_id}", response_model=models.QuizChoice)
-async def create_choices(
+def create_choices(
     *,
     db: Session = Depends(deps.get_db),
     choice_in: models.QuizChoiceCreate,
     question: models.QuizQuestion = Depends(deps.get_question),
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Create a choice for the given question.
@@ -33,12 +33,12 @@ async def create_choices(
     "/{quiz_index}/questions/{question_id}/choices/{choice_id}",
     response_model=models.QuizChoice,
 )
-async def update_choice(
+def update_choice(
     *,
     db: Session = Depends(deps.get_db),
     choice_in: models.QuizChoiceUpdate,
     choice: models.QuizChoice = Depends(deps.get_choice),
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Update choice by quiz_index, question id, and choice id.
@@ -52,11 +52,11 @@ async def update_choice(
     "/{quiz_index}/questions/{question_id}/choices/{choice_id}",
     response_model=models.QuizChoice,
 )
-async def delete_choice(
+def delete_choice(
     *,
     db: Session = Depends(deps.get_db),
     choice: models.QuizChoice = Depends(deps.get_choice),
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Delete choice by id.
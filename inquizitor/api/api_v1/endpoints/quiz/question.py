@@ -13,12 +13,12 @@ router = APIRouter()
 
 
 @router.post("/{quiz_index}/questions", response_model=models.QuizQuestion)
-async def create_questions(
+def create_questions(
     *,
     db: Session = Depends(deps.get_db),
     quiz: models.Quiz = Depends(deps.get_quiz),
     question_in: models.QuizQuestionCreate,
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Create a question for the given quiz.
@@ -33,11 +33,13 @@ async def create_questions(
     "/{quiz_index}/questions/{question_id}",
     response_model=models.QuizQuestionReadWithChoices,
 )
-async def read_question(
+def read_question(
     *,
     db: Session = Depends(deps.get_db),
-    question: models.QuizQuestion = Depends(deps.get_question),
-    current_user: models.User = Depends(deps.get_current_user),
+    question: models.QuizQuestion = Depends(
+        deps.get_question_with("question_with_choices")
+    ),
+    current_user: models.UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Retrieve question by id.
@@ -47,12 +49,12 @@ async def read_question(
 
 
 @router.put("/{quiz_index}/questions/{question_id}", response_model=models.QuizQuestion)
-async def update_question(
+def update_question(
     *,
     db: Session = Depends(deps.get_db),
     question_in: models.QuizQuestionUpdate,
     question: models.QuizQuestion = Depends(deps.get_question),
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Update question by quiz_index and question id.
@@ -65,11 +67,11 @@ async def update_question(
 @router.delete(
     "/{quiz_index}/questions/{question_id}", response_model=models.QuizQuestion
 )
-async def delete_question(
+def delete_question(
     *,
     db: Session = Depends(deps.get_db),
     question: models.QuizQuestion = Depends(deps.get_question),
-    current_author: models.User = Depends(deps.get_current_author),
+    current_author: models.UserSnapshot = Depends(deps.get_current_author),
 ) -> Any:
     """
     Delete question by id.
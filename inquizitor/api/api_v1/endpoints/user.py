@@ -7,19 +7,19 @@ from typing import Any, List
 
 from inquizitor import crud
 from inquizitor.api import deps
-from inquizitor.models import User, UserCreate, ShowUser, UserUpdate
+from inquizitor.models import User, UserCreate, ShowUser, UserSnapshot, UserUpdate
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ShowUser])
-async def read_users(
+def read_users(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
     # NOTE User instead of ShowUser para available lahat ng properties for processing
     # mafifilter out naman yung response via response_model param
-    current_user: User = Depends(deps.get_current_superuser),
+    current_user: UserSnapshot = Depends(deps.get_current_superuser),
 ) -> Any:
     """
     Retrieve users.
@@ -29,7 +29,7 @@ async def read_users(
 
 
 @router.post("/", response_model=ShowUser)
-async def create_user(
+def create_user(
     *,
     db: Session = Depends(deps.get_db),
     user_in: UserCreate,
@@ -54,9 +54,9 @@ async def create_user(
 
 
 @router.get("/profile", response_model=ShowUser)
-async def read_profile(
+def read_profile(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user.
@@ -72,12 +72,14 @@ def update_profile(
     password: str = Body(None),
     full_name: str = Body(None),
     email: EmailStr = Body(None),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Update own user.
     """
-    current_user_data = jsonable_encoder(current_user)
+    # the snapshot is read-only, update the actual row
+    db_user = crud.user.get(db, id=current_user.id)
+    current_user_data = jsonable_encoder(db_user)
     user_in = UserUpdate(**current_user_data)
     if password is not None:
         user_in.password = password
@@ -85,21 +87,21 @@ def update_profile(
         user_in.full_name = full_name
     if email is not None:
         user_in.email = email
-    user = crud.user.update(db, db_obj=current_user, obj_in=user_in)
+    user = crud.user.update(db, db_obj=db_user, obj_in=user_in)
     return user
 
 
 @router.get("/{id}", response_model=ShowUser)
-async def read_user(
+def read_user(
     id: int,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ):
     """
     Get a specific user by id.
     """
     user = crud.user.get(db, id=id)
-    if user == current_user:
+    if user and user.id == current_user.id:
         return user
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
@@ -109,12 +111,12 @@ async def read_user(
 
 
 @router.put("/{id}", response_model=ShowUser)
-async def update_user(
+def update_user(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
     user_in: UserUpdate,
-    current_user: User = Depends(deps.get_current_superuser),
+    current_user: UserSnapshot = Depends(deps.get_current_superuser),
 ):
     """
     Update a user.
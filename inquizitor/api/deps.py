@@ -1,6 +1,7 @@
+import logging
 from sqlmodel import Session
 from sqlalchemy import and_
-from typing import Generator, Tuple, Union
+from typing import Callable, Generator, Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, Path, status
 from fastapi.security import OAuth2PasswordBearer
@@ -8,8 +9,12 @@ from fastapi_jwt_auth import AuthJWT
 from fastapi_jwt_auth.exceptions import JWTDecodeError
 
 from inquizitor import crud, models
+from inquizitor.core.config import settings
+from inquizitor.crud.base import get_identity_cache_stats
 from inquizitor.db.session import SessionLocal
 
+logger = logging.getLogger(__name__)
+
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"/login/access-token")
 
 
@@ -18,12 +23,18 @@ def get_db() -> Generator:
         db = SessionLocal()
         yield db
     finally:
+        if settings.DEBUG:
+            stats = get_identity_cache_stats(db)
+            logger.info(
+                f"Identity cache: {stats['hits']} hits, {stats['misses']} misses"
+            )
         db.close()
 
 
 def get_current_user(
     db: Session = Depends(get_db), Authorize: AuthJWT = Depends()
-) -> models.User:
+) -> models.UserSnapshot:
+    """Read-only snapshot of the logged in user, load the User when it's needed"""
     try:
         Authorize.jwt_required()
     except JWTDecodeError as err:
@@ -33,15 +44,15 @@ def get_current_user(
             status_code = 401
         raise HTTPException(status_code=status_code, detail="User not logged in")
 
-    user = crud.user.get(db, id=Authorize.get_jwt_subject())
+    user = crud.user.get_snapshot(db, id=Authorize.get_jwt_subject())
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 def get_current_superuser(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: models.UserSnapshot = Depends(get_current_user),
+) -> models.UserSnapshot:
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
@@ -50,8 +61,8 @@ def get_current_superuser(
 
 
 def get_current_teacher(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: models.UserSnapshot = Depends(get_current_user),
+) -> models.UserSnapshot:
     if not (crud.user.is_superuser(current_user) or crud.user.is_teacher(current_user)):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
@@ -60,8 +71,8 @@ def get_current_teacher(
 
 
 def get_current_student(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: models.UserSnapshot = Depends(get_current_user),
+) -> models.UserSnapshot:
     if not crud.user.is_student(current_user):
         raise HTTPException(status_code=400, detail="User must be a student")
     return current_user
@@ -74,7 +85,28 @@ def get_quiz(
         ..., description="ID or Code of quiz to retrieve"
     ),
 ) -> models.Quiz:
-    quiz = crud.quiz.get(db, id=quiz_index)
+    return _get_quiz(db, quiz_index=quiz_index)
+
+
+def get_quiz_with(profile: str) -> Callable[..., models.Quiz]:
+    """Like get_quiz, with the relationships of the load profile loaded"""
+
+    def get_quiz_with_profile(
+        *,
+        db: Session = Depends(get_db),
+        quiz_index: Union[int, str] = Path(
+            ..., description="ID or Code of quiz to retrieve"
+        ),
+    ) -> models.Quiz:
+        return _get_quiz(db, quiz_index=quiz_index, profile=profile)
+
+    return get_quiz_with_profile
+
+
+def _get_quiz(
+    db: Session, *, quiz_index: Union[int, str], profile: Optional[str] = None
+) -> models.Quiz:
+    quiz = crud.quiz.get(db, id=quiz_index, profile=profile)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
@@ -87,10 +119,37 @@ def get_question(
     question_id: int,
     quiz: models.Quiz = Depends(get_quiz),
 ) -> models.QuizQuestion:
-    question = crud.quiz_question.get(db, id=question_id)
+    return _get_question(db, question_id=question_id, quiz=quiz)
+
+
+def get_question_with(profile: str) -> Callable[..., models.QuizQuestion]:
+    """Like get_question, with the relationships of the load profile loaded"""
+
+    def get_question_with_profile(
+        *,
+        db: Session = Depends(get_db),
+        question_id: int,
+        quiz: models.Quiz = Depends(get_quiz),
+    ) -> models.QuizQuestion:
+        return _get_question(db, question_id=question_id, quiz=quiz, profile=profile)
+
+    return get_question_with_profile
+
+
+def _get_question(
+    db: Session,
+    *,
+    question_id: int,
+    quiz: models.Quiz,
+    profile: Optional[str] = None,
+) -> models.QuizQuestion:
+    question = crud.quiz_question.get_by_quiz(
+        db, id=question_id, quiz_id=quiz.id, profile=profile
+    )
     if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    if not crud.quiz.has_question(db, quiz_index=quiz.id, question_id=question.id):
+        # only failed lookups pay for telling both errors apart
+        if not crud.quiz_question.get(db, id=question_id):
+            raise HTTPException(status_code=404, detail="Question not found")
         raise HTTPException(
             status_code=404, detail="Question does not belong to the specified quiz"
         )
@@ -104,14 +163,12 @@ def get_choice(
     choice_id: int,
     question: models.QuizQuestion = Depends(get_question),
 ) -> models.QuizChoice:
-    choice = crud.quiz_choice.get(db, id=choice_id)
+    choice = crud.quiz_choice.get_by_question(db, id=choice_id, question_id=question.id)
     if not choice:
-        raise HTTPException(status_code=404, detail="Choice not found")
-    if not crud.quiz_question.has_choice(
-        db, question_id=question.id, choice_id=choice.id
-    ):
+        if not crud.quiz_choice.get(db, id=choice_id):
+            raise HTTPException(status_code=404, detail="Choice not found")
         raise HTTPException(
-            status_code=404, detail="Question does not belong to the specified quiz"
+            status_code=404, detail="Choice does not belong to the specified question"
         )
 
     return choice
@@ -121,7 +178,7 @@ def get_attempt(
     *,
     db: Session = Depends(get_db),
     quiz: models.Quiz = Depends(get_quiz),
-    current_student: models.User = Depends(get_current_student),
+    current_student: models.UserSnapshot = Depends(get_current_student),
 ) -> models.QuizAttempt:
     attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
         db, quiz_id=quiz.id, student_id=current_student.id
@@ -137,42 +194,43 @@ def get_attempt_and_link(
     db: Session = Depends(get_db),
     quiz: models.Quiz = Depends(get_quiz),
     question: models.QuizQuestion = Depends(get_question),
-    current_student: models.User = Depends(get_current_student),
+    current_student: models.UserSnapshot = Depends(get_current_student),
 ) -> Tuple[models.QuizAttempt, models.QuizStudentLink]:
-    attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
-        db, quiz_id=quiz.id, student_id=current_student.id
-    )
-    if not attempt or attempt.is_done:
-        quiz_attempt_in = models.QuizAttemptCreate(
-            student_id=current_student.id,
-            quiz_id=quiz.id,
-            recent_question_id=question.id,
-        )
-        attempt = crud.quiz_attempt.create(db, obj_in=quiz_attempt_in)
-    else:
-        attempt = crud.quiz_attempt.update(
-            db, db_obj=attempt, obj_in={"recent_question_id": question.id}
+    if settings.ANSWER_AUTOSAVE:
+        # most clicks land on an open attempt, so read it before writing
+        attempt_and_link = crud.quiz_attempt.get_open_and_link(
+            db, quiz_id=quiz.id, student_id=current_student.id
         )
+        if attempt_and_link:
+            return tuple(attempt_and_link)
+
+    return crud.quiz_attempt.ensure_attempt(
+        db,
+        quiz_id=quiz.id,
+        student_id=current_student.id,
+        recent_question_id=question.id,
+        # autosaved answers update the recent question when they're written
+        update_recent_question=not settings.ANSWER_AUTOSAVE,
+    )
+
 
-    link = crud.quiz_student_link.get_by_quiz_and_student_ids(
+def get_open_attempt_and_link(
+    *,
+    db: Session = Depends(get_db),
+    quiz: models.Quiz = Depends(get_quiz),
+    current_student: models.UserSnapshot = Depends(get_current_student),
+) -> Tuple[models.QuizAttempt, models.QuizStudentLink]:
+    return crud.quiz_attempt.ensure_attempt(
         db, quiz_id=quiz.id, student_id=current_student.id
     )
-    if not link:
-        quiz_student_link_in = models.QuizStudentLinkCreate(
-            student_id=current_student.id,
-            quiz_id=quiz.id,
-        )
-        link = crud.quiz_student_link.create(db, obj_in=quiz_student_link_in)
-
-    return (attempt, link)
 
 
 def get_current_author(
     *,
     db: Session = Depends(get_db),
     quiz: models.Quiz = Depends(get_quiz),
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: models.UserSnapshot = Depends(get_current_user),
+) -> models.UserSnapshot:
     if not (
         crud.user.is_superuser(current_user)
         or crud.quiz.is_author(db, user_id=current_user.id, quiz_index=quiz.id)
@@ -2,6 +2,8 @@ import click
 
 from .initial_data import initial_data
 from .initial_data import test
+from .regrade import check_scores, regrade
+from .tokens import purge_tokens
 
 
 @click.group()
@@ -9,8 +9,8 @@ logger = logging.getLogger(__name__)
 
 
 def init() -> None:
-    db = SessionLocal()
-    init_db(db, engine)
+    with SessionLocal() as db:
+        init_db(db, engine)
 
 
 @click.command()
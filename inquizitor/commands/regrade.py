@@ -0,0 +1,37 @@
+import click
+import logging
+
+from inquizitor import crud
+from inquizitor.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option("--quiz-id", type=int, default=None, help="Only regrade this quiz.")
+def regrade(quiz_id: int) -> None:
+    """Grade answers again after the correct choice of a question changes."""
+    with SessionLocal() as db:
+        count = crud.quiz_attempt.regrade(db, quiz_id=quiz_id)
+    logger.info(f"Regraded {count} attempt(s)")
+
+
+@click.command()
+@click.option("--quiz-id", type=int, default=None, help="Only check this quiz.")
+@click.option("--fix", is_flag=True, help="Regrade the attempts with drifted scores.")
+def check_scores(quiz_id: int, fix: bool) -> None:
+    """Recompute stored scores and report the ones that drifted."""
+    with SessionLocal() as db:
+        drift = crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz_id)
+        for attempt_id, stored, computed in drift:
+            logger.warning(
+                f"Attempt {attempt_id}: stored {stored}, computed {computed}"
+            )
+        logger.info(f"Found {len(drift)} attempt(s) with drifted scores")
+
+        if fix and drift:
+            count = crud.quiz_attempt.regrade(
+                db, ids=[attempt_id for attempt_id, stored, computed in drift]
+            )
+            logger.info(f"Regraded {count} attempt(s)")
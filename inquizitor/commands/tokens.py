@@ -0,0 +1,25 @@
+import click
+import logging
+import time
+
+from inquizitor import crud
+from inquizitor.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def purge_expired_tokens(chunk_size: int = 1000) -> int:
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        count = crud.token.purge_expired(db, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+    logger.info(f"Purged {count} expired revoked token(s) in {elapsed:.2f}s")
+    return count
+
+
+@click.command()
+@click.option("--chunk-size", type=int, default=1000, help="Rows deleted per commit.")
+def purge_tokens(chunk_size: int) -> None:
+    """Delete revoked tokens that have expired."""
+    purge_expired_tokens(chunk_size=chunk_size)
@@ -0,0 +1,165 @@
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlmodel import Session
+
+from inquizitor import crud, models
+from inquizitor.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerBufferFull(Exception):
+    """The buffer stayed full for longer than the caller was willing to wait"""
+
+
+class PendingAnswer(NamedTuple):
+    choice_id: int
+    student_id: int
+    quiz_id: int
+
+
+class AnswerBuffer:
+    """Write-behind buffer for answer changes.
+
+    Changes are keyed by (attempt_id, question_id) so repeated clicks on the
+    same question coalesce (last write wins). A background thread writes them
+    every ``interval_ms`` with ``crud.quiz_answer.upsert_multi``; readers call
+    ``flush`` first so they see their own buffered answers. When ``max_size``
+    answers are pending, ``put`` waits for a flush and then gives up with
+    ``AnswerBufferFull``.
+    """
+
+    def __init__(self, max_size: int, interval_ms: int, put_timeout: float):
+        self.max_size = max_size
+        self.interval_ms = interval_ms
+        self.put_timeout = put_timeout
+        self._pending: "OrderedDict[Tuple[int, int], PendingAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        # flushes are serialized so an older batch can't land after a newer one
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session_factory: Optional[Callable[[], Session]] = None
+
+    def put(
+        self,
+        *,
+        attempt: models.QuizAttempt,
+        question_id: int,
+        choice_id: int,
+    ) -> None:
+        key = (attempt.id, question_id)
+        with self._not_full:
+            if key not in self._pending and len(self._pending) >= self.max_size:
+                self._wake.set()
+                if not self._not_full.wait_for(
+                    lambda: len(self._pending) < self.max_size, self.put_timeout
+                ):
+                    raise AnswerBufferFull()
+            self._pending.pop(key, None)
+            self._pending[key] = PendingAnswer(
+                choice_id, attempt.student_id, attempt.quiz_id
+            )
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def flush(
+        self,
+        db: Session,
+        *,
+        attempt_id: Optional[int] = None,
+        student_id: Optional[int] = None,
+        quiz_id: Optional[int] = None,
+    ) -> int:
+        """Write the pending answers (only the matching ones if filtered),
+        returns how many were written.
+        """
+        with self._flush_lock:
+            with self._not_full:
+                keys = [
+                    key
+                    for key, pending in self._pending.items()
+                    if (attempt_id is None or key[0] == attempt_id)
+                    and (student_id is None or pending.student_id == student_id)
+                    and (quiz_id is None or pending.quiz_id == quiz_id)
+                ]
+                batch = {key: self._pending.pop(key) for key in keys}
+                self._not_full.notify_all()
+            if not batch:
+                return 0
+
+            items: Dict[int, list] = defaultdict(list)
+            for (batch_attempt_id, question_id), pending in batch.items():
+                items[batch_attempt_id].append(
+                    models.QuizAnswerBatchItem(
+                        question_id=question_id, choice_id=pending.choice_id
+                    )
+                )
+            written = set()
+            try:
+                for batch_attempt_id, attempt_items in items.items():
+                    attempt = crud.quiz_attempt.get(db, id=batch_attempt_id)
+                    if not attempt or attempt.is_done:
+                        logger.warning(
+                            f"Dropped {len(attempt_items)} buffered answer(s) "
+                            f"of closed attempt {batch_attempt_id}"
+                        )
+                    else:
+                        crud.quiz_answer.upsert_multi(
+                            db, attempt=attempt, items=attempt_items
+                        )
+                    written.add(batch_attempt_id)
+            except Exception:
+                db.rollback()
+                # put back what wasn't written, unless a newer change came in
+                with self._not_full:
+                    for key, pending in batch.items():
+                        if key[0] not in written:
+                            self._pending.setdefault(key, pending)
+                raise
+            return len(batch)
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        self._session_factory = session_factory
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="answer-autosave", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever is still pending"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        if self._pending and self._session_factory is not None:
+            with self._session_factory() as db:
+                self.flush(db)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval_ms / 1000)
+            self._wake.clear()
+            if not self._pending:
+                continue
+            try:
+                with self._session_factory() as db:
+                    count = self.flush(db)
+                logger.debug(f"Autosaved {count} answer(s)")
+            except Exception:
+                logger.exception("Autosaving answers failed")
+
+
+answer_buffer = AnswerBuffer(
+    max_size=settings.ANSWER_AUTOSAVE_MAX_SIZE,
+    interval_ms=settings.ANSWER_AUTOSAVE_INTERVAL_MS,
+    put_timeout=settings.ANSWER_AUTOSAVE_PUT_TIMEOUT,
+)
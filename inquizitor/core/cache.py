@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire.
+
+    Each entry stores an absolute expiry (``time.time()`` seconds), either the
+    one given to ``set`` or ``now + ttl``. With ``maxsize`` the least recently
+    used entry is evicted once the cache is full.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, maxsize: Optional[int] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, *, expires_at: Optional[float] = None
+    ) -> None:
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def prune(self) -> int:
+        """Drop expired entries, returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key
+                for key, (_, expires_at) in self._data.items()
+                if expires_at is not None and expires_at <= now
+            ]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _missing) is not _missing
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._data))
+
+
+_missing = object()
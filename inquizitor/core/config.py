@@ -1,8 +1,9 @@
 import os, secrets
 from pathlib import Path
+from typing import List, Optional
 from dotenv import load_dotenv
 
-from pydantic import BaseSettings, EmailStr
+from pydantic import BaseSettings, EmailStr, validator
 
 env_path = Path(".") / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -14,12 +15,19 @@ class Settings(BaseSettings):
 	With refresh tokens and basic permission control"""
     PROJECT_VERSION: str = "1.0.0"
     USE_SQLITE: bool = os.getenv("USE_SQLITE")
+    DEBUG: bool = os.getenv("DEBUG", False)
 
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60  # 1 minute
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
+    # a token not found in the in-memory denylist is looked up in the database at
+    # most once per this many seconds, so a logout on another worker applies
+    # within this delay (0 looks it up on every request)
+    DENYLIST_RECHECK_SECONDS: int = 5
+    # purge expired revoked tokens in the background, 0 disables it
+    TOKEN_PURGE_INTERVAL_MINUTES: int = os.getenv("TOKEN_PURGE_INTERVAL_MINUTES", 0)
 
     # Configure application to store and get JWT from cookies
     AUTHJWT_TOKEN_LOCATION: set = {"cookies"}
@@ -32,6 +40,77 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", 5432)
     POSTGRES_DB: str = os.getenv("POSTGRES_db", "tdd")
 
+    # authenticated users are served from a per-process cache for this long
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_SIZE: int = 1024
+
+    # sync endpoints and dependencies run in this many worker threads (anyio's
+    # default): up to half may wait on password hashing, the other half covers
+    # every pooled connection (DB_POOL_SIZE + DB_MAX_OVERFLOW = 15) plus requests
+    # that don't hold one; beyond that, threads just wait for a connection
+    THREADPOOL_MAX_WORKERS: int = 40
+
+    # new hashes use the first scheme, hashes in the other schemes (or with other
+    # bcrypt rounds) are upgraded on the next login, e.g. '["argon2", "bcrypt"]'
+    # (argon2 needs argon2-cffi)
+    PASSWORD_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    # password hashing runs on its own pool, requests beyond the queue get a 503;
+    # every running or queued hash holds a request thread, so workers + queue may
+    # be at most half of THREADPOOL_MAX_WORKERS, the rest keep serving requests
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 12
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+
+    # buffer answer changes and write them in batches instead of on every click;
+    # the buffer is per process, so only enable it with a single worker process:
+    # with several, an attempt finished on another worker drops the answers
+    # still buffered here
+    ANSWER_AUTOSAVE: bool = False
+    ANSWER_AUTOSAVE_INTERVAL_MS: int = 500
+    ANSWER_AUTOSAVE_MAX_SIZE: int = 10000
+    ANSWER_AUTOSAVE_PUT_TIMEOUT: float = 1  # seconds to wait while it's full
+
+    # request, pool, password hashing and denylist metrics at /metrics; when
+    # METRICS_TOKEN is set, scrapers must send an 'Authorization: Bearer <token>'
+    # header, otherwise keep /metrics unreachable from outside
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: Optional[str] = None
+
+    # superusers can profile a request with an 'X-Profile: 1' header or '?profile=1',
+    # one request at a time
+    PROFILING_ENABLED: bool = False
+    PROFILING_INTERVAL_MS: float = 5
+    PROFILING_TOP: int = 30
+
+    # warn when one request runs the same statement more than this many times
+    # (an N+1), 0 disables the warning
+    QUERY_REPEAT_THRESHOLD: int = 5
+
+    # statements slower than this are logged to SLOW_QUERY_LOG_FILE with their
+    # route (and query plan with SLOW_QUERY_EXPLAIN), 0 (the default) disables
+    # it; parameters are only logged with SLOW_QUERY_LOG_PARAMETERS, password
+    # hashes, emails and token IDs redacted
+    SLOW_QUERY_THRESHOLD_MS: int = 0
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_LOG_PARAMETERS: bool = False
+    SLOW_QUERY_MAX_PARAMS_LENGTH: int = 200
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    # responses to requests with an Idempotency-Key header are replayed for this long
+    IDEMPOTENCY_TTL_SECONDS: int = 60 * 60 * 24
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+
+    # connection pool, only used with PostgreSQL
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 60 * 30  # seconds
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_POOL_SLOW_CHECKOUT_MS: int = 100
+
     if USE_SQLITE:
         SQLALCHEMY_DATABASE_URI = "sqlite:///inquizitor/data.db"
     else:
@@ -57,9 +136,21 @@ class Settings(BaseSettings):
     FIRST_TEACHER_FIRSTNAME: str = "Chair"
     FIRST_TEACHER_PASSWORD: str = "superteacher"
 
+    @validator("PASSWORD_HASH_QUEUE_SIZE")
+    def leave_threads_for_requests(cls, v, values):
+        if "THREADPOOL_MAX_WORKERS" in values and "PASSWORD_HASH_WORKERS" in values:
+            limit = values["THREADPOOL_MAX_WORKERS"] // 2
+            if values["PASSWORD_HASH_WORKERS"] + v > limit:
+                raise ValueError(
+                    "PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE must be at "
+                    f"most half of THREADPOOL_MAX_WORKERS ({limit})"
+                )
+        return v
+
     authjwt_secret_key: str = SECRET_KEY
     authjwt_denylist_enabled: bool = True
     authjwt_denylist_token_checks: set = {"access", "refresh"}
+    authjwt_access_cookie_key: str = "access_token_cookie"
 
 
 settings = Settings()
@@ -0,0 +1,71 @@
+from typing import Iterable, Optional, Tuple
+
+from inquizitor.core.cache import TTLCache
+from inquizitor.core.config import settings
+
+
+class TokenDenylist:
+    """In-process set of revoked JWT ids (jti).
+
+    Every entry is kept until the token's own ``exp``, after which the token is
+    rejected by signature verification anyway, so it ages out on its own. This
+    is a read path only: revocations are written to the ``RevokedToken`` table
+    first (see ``crud.token``) and loaded back with ``load`` on startup.
+    There is no ``maxsize`` on purpose, evicting a live entry would un-revoke
+    the token.
+
+    Other processes revoke tokens too, so ``crud.token.is_revoked`` looks up
+    the tokens missing here in the database. Tokens found there unrevoked are
+    remembered for ``recheck`` seconds, forgetting them early only costs a
+    lookup.
+    """
+
+    def __init__(self, recheck: float = 0, max_checked: int = 100000):
+        self.recheck = recheck
+        self._tokens = TTLCache()
+        self._checked = TTLCache(ttl=recheck, maxsize=max_checked)
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, jti: str, exp: Optional[float] = None) -> None:
+        self._tokens.set(jti, True, expires_at=exp)
+
+    def load(self, entries: Iterable[Tuple[str, Optional[float]]]) -> int:
+        count = 0
+        for jti, exp in entries:
+            self.add(jti, exp)
+            count += 1
+        return count
+
+    def is_revoked(self, jti: str) -> bool:
+        revoked = jti in self._tokens
+        if revoked:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return revoked
+
+    def was_checked(self, jti: str) -> bool:
+        """Whether the token was found unrevoked in the database recently"""
+        return jti in self._checked
+
+    def mark_checked(self, jti: str) -> None:
+        if self.recheck:
+            self._checked.set(jti, True)
+
+    def prune(self) -> int:
+        self._checked.prune()
+        return self._tokens.prune()
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._checked.clear()
+
+    def __contains__(self, jti: str) -> bool:
+        return self.is_revoked(jti)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+
+denylist = TokenDenylist(recheck=settings.DENYLIST_RECHECK_SECONDS)
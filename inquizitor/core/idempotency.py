@@ -0,0 +1,118 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from inquizitor.core.cache import TTLCache
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class CachedResponse:
+    def __init__(
+        self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]]
+    ):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = b""
+
+
+class IdempotencyMiddleware:
+    """Replay the stored response of a request sent again with the same
+    ``Idempotency-Key`` header, without running the endpoint (or touching the
+    database) a second time.
+
+    Keys are scoped to the client's credentials, method and path. Reusing a key
+    for a different body is a 422, and a retry arriving while the first request
+    is still running is a 409. Server errors are not stored so they can be
+    retried. Responses are kept in memory for ``ttl`` seconds, per process:
+    a retry landing on another worker runs again, which the database upserts
+    make harmless.
+    """
+
+    def __init__(self, app: ASGIApp, ttl: float, maxsize: int):
+        self.app = app
+        self.responses = TTLCache(ttl=ttl, maxsize=maxsize)
+        # only touched from the event loop, so it needs no lock
+        self._in_flight = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+
+        credentials = hashlib.sha256(
+            (headers.get("cookie", "") + headers.get("authorization", "")).encode()
+        ).hexdigest()
+        cache_key = (credentials, scope["method"], scope["path"], key)
+
+        messages = []
+        body = hashlib.sha256()
+        while True:
+            message = await receive()
+            messages.append(message)
+            body.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        fingerprint = body.hexdigest()
+
+        cached = self.responses.get(cache_key)
+        if cached is not None:
+            if cached.fingerprint != fingerprint:
+                response = JSONResponse(
+                    status_code=422,
+                    content={"detail": "Idempotency-Key was used for another request"},
+                )
+                await response(scope, receive, send)
+                return
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": cached.status,
+                    "headers": cached.headers + [(b"idempotent-replayed", b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        if cache_key in self._in_flight:
+            response = JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is running"},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        self._in_flight.add(cache_key)
+
+        async def replay_receive() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        stored: Optional[CachedResponse] = None
+
+        async def store_send(message: Message) -> None:
+            nonlocal stored
+            if message["type"] == "http.response.start":
+                stored = CachedResponse(
+                    fingerprint, message["status"], list(message.get("headers", []))
+                )
+            elif message["type"] == "http.response.body" and stored is not None:
+                stored.body += message.get("body", b"")
+                if not message.get("more_body", False) and stored.status < 500:
+                    self.responses.set(cache_key, stored)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, store_send)
+        finally:
+            self._in_flight.discard(cache_key)
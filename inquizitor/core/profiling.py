@@ -0,0 +1,189 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Callable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (filename, first line, function name)
+CodeKey = Tuple[str, int, str]
+
+
+def _short_filename(filename: str) -> str:
+    """Filename relative to the longest sys.path entry containing it"""
+    best = ""
+    for path in sys.path:
+        if path and filename.startswith(path + os.sep) and len(path) > len(best):
+            best = path
+    return filename[len(best) + 1 :] if best else filename
+
+
+class StackSampler:
+    """Sampling profiler: a thread reads the stack of every other thread each
+    ``interval`` seconds.
+
+    Only stacks going through ``include`` (the application package) are counted,
+    which leaves out idle worker threads and the event loop waiting on I/O.
+    Unlike cProfile, which follows the thread that enables it, this sees the
+    worker threads sync endpoints run in. Other requests running at the same
+    time are counted too, so profile on a quiet instance.
+    """
+
+    def __init__(self, interval: float = 0.005, include: str = PACKAGE_DIR):
+        self.interval = interval
+        self.include = include
+        self.samples = 0
+        self.elapsed = 0.0
+        self.cumulative: Counter = Counter()
+        self.own: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def sample(self) -> None:
+        this_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == this_thread:
+                continue
+            stack: List[CodeKey] = []
+            included = False
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                included = included or code.co_filename.startswith(self.include)
+                frame = frame.f_back
+            if not included:
+                continue
+            self.samples += 1
+            self.own[stack[0]] += 1
+            # recursive functions count once per sample
+            self.cumulative.update(set(stack))
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started_at
+
+    def top(self, limit: int) -> List[Tuple[CodeKey, float, float]]:
+        """Functions by cumulative time: (function, cumulative, own) seconds"""
+        return [
+            (key, count * self.interval, self.own[key] * self.interval)
+            for key, count in self.cumulative.most_common(limit)
+        ]
+
+    def report(self, limit: int, title: str = "") -> str:
+        lines = [
+            f"{title}{self.samples} samples every {self.interval * 1000:g}ms "
+            f"over {self.elapsed:.3f}s",
+            "",
+            f"{'cum (s)':>9} {'own (s)':>9}  function",
+        ]
+        for (filename, lineno, name), cumulative, own in self.top(limit):
+            lines.append(
+                f"{cumulative:9.3f} {own:9.3f}  "
+                f"{name} ({_short_filename(filename)}:{lineno})"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    """Profile a single request sent with an ``X-Profile: 1`` header or a
+    ``profile=1`` query parameter, if ``authorize`` lets its sender.
+
+    The response is replaced by the top ``limit`` functions by cumulative time,
+    also logged at INFO, and its original status is kept in the
+    ``X-Profiled-Status`` header. Other requests only pay for the flag lookup.
+    The sampler sees every thread, so a request asking to be profiled while
+    another one is gets a 429 instead of a mixed-up report.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        authorize: Callable[[Request], Awaitable[bool]],
+        interval: float = 0.005,
+        limit: int = 30,
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.interval = interval
+        self.limit = limit
+        self._profiling = False
+
+    @staticmethod
+    def _is_requested(scope: Scope) -> bool:
+        if Headers(scope=scope).get("x-profile") not in (None, "", "0"):
+            return True
+        query_string = scope["query_string"]
+        if b"profile" not in query_string:
+            return False
+        values = parse_qs(query_string.decode("latin-1")).get("profile", [])
+        return any(value not in ("", "0") for value in values)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self._is_requested(scope)
+            or not await self.authorize(Request(scope))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # no await between the check and the set, so no other request between
+        if self._profiling:
+            response = PlainTextResponse(
+                "Another request is being profiled, try again shortly\n",
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        self._profiling = True
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._profiling = False
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        status = 500
+
+        async def discard_response(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = StackSampler(interval=self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            sampler.stop()
+
+        report = sampler.report(
+            self.limit, title=f"{scope['method']} {scope['path']} -> {status}: "
+        )
+        logger.info(report)
+        response = PlainTextResponse(report, headers={"X-Profiled-Status": str(status)})
+        await response(scope, receive, send)
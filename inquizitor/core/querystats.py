@@ -0,0 +1,135 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from inquizitor.core.metrics import get_route_template
+
+logger = logging.getLogger(__name__)
+
+# placeholder lists such as IN (?, ?, ?) or VALUES (%(a)s, %(b)s)
+_PLACEHOLDERS = re.compile(
+    r"\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)"
+)
+_NUMBERS = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Shape of the statement: whitespace collapsed, literal numbers and
+    placeholder lists (whatever their length) replaced by ``?``
+    """
+    statement = _SPACES.sub(" ", statement).strip()
+    statement = _PLACEHOLDERS.sub("(?)", statement)
+    return _NUMBERS.sub("?", statement)
+
+
+class QueryStats:
+    """SQL statements run while tracking, and the time spent in them"""
+
+    def __init__(self, route: str = ""):
+        self.route = route  # e.g. "GET /quizzes/{quiz_id}"
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes that ran more than ``threshold`` times"""
+        return [
+            (shape, count)
+            for shape, count in self.fingerprints.most_common()
+            if count > threshold
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.3f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_current() -> Optional[QueryStats]:
+    """Stats of the innermost ``track_queries``, if any"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started_at = getattr(context, "_query_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+def instrument(engine: Engine) -> None:
+    """Record the statements the engine runs into the current ``track_queries``"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries(route: str = "") -> Iterator[QueryStats]:
+    """Collect the statements run in this context (and the worker threads it
+    starts with ``run_in_threadpool``, which copy the context)
+    """
+    stats = QueryStats(route)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryStatsMiddleware:
+    """Count the statements and database time of each request.
+
+    They are sent back in a ``Server-Timing`` header, e.g.
+    ``db;dur=4.210;desc="3 queries"``, and a warning is logged for every
+    statement shape run more than ``repeat_threshold`` times by one request,
+    which is usually an N+1 (0 disables the warning).
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {get_route_template(scope) or 'unmatched'}"
+        with track_queries(route) as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        if self.repeat_threshold:
+            for shape, count in stats.repeated(self.repeat_threshold):
+                logger.warning(
+                    f"{route} ran the same statement {count} times, "
+                    f"possible N+1: {shape}"
+                )
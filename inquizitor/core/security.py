@@ -1,19 +1,134 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from threading import BoundedSemaphore, Lock
+from typing import Any, Callable, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from inquizitor.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=settings.PASSWORD_SCHEMES,
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+_bcrypt_rounds = settings.BCRYPT_ROUNDS
+
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    """Change the bcrypt cost of new hashes (settings.BCRYPT_ROUNDS by default)"""
+    global _bcrypt_rounds
+    pwd_context.update(bcrypt__rounds=rounds)
+    _bcrypt_rounds = rounds
+
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the queue is full"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread or process pool.
+
+    At most ``max_workers`` hashes run at once and ``max_queue`` more may wait,
+    anything beyond that raises ``PasswordHasherBusy`` immediately instead of
+    piling up behind a login rush.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self._slots = BoundedSemaphore(max_workers + max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = Lock()
+        # hashes running or waiting for a worker, and hashes turned away
+        self.in_use = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # created on first use so importing this module doesn't spawn processes
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="password-hasher"
+                    )
+            return self._executor
+
+    @property
+    def queued(self) -> int:
+        """Hashes waiting for a free worker"""
+        return max(self.in_use - self.max_workers, 0)
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self.in_use += 1
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+    use_processes=settings.PASSWORD_HASH_USE_PROCESSES,
+)
+
+
+# module level so they can be sent to a process pool; the bcrypt rounds are
+# passed along because set_bcrypt_rounds only changes this process' context
+def _use_bcrypt_rounds(rounds: int) -> None:
+    if rounds != _bcrypt_rounds:
+        set_bcrypt_rounds(rounds)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(
+    plain_password: str, hashed_password: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    _use_bcrypt_rounds(rounds)
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str, rounds: int) -> str:
+    _use_bcrypt_rounds(rounds)
     return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return hasher.run(_verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a new hash too if the old one is outdated"""
+    return hasher.run(
+        _verify_and_update, plain_password, hashed_password, _bcrypt_rounds
+    )
+
+
+def get_password_hash(password: str) -> str:
+    return hasher.run(_hash, password, _bcrypt_rounds)
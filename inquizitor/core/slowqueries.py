@@ -0,0 +1,200 @@
+import logging
+import os
+import re
+import sys
+import time
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from inquizitor.core.config import settings
+from inquizitor.core.querystats import fingerprint, get_current
+
+# see add_file_handler
+slow_query_logger = logging.getLogger("inquizitor.slow_queries")
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_DIR = os.path.join(PACKAGE_DIR, "core")
+
+EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+# parameters bound to these columns are logged as '***'
+SENSITIVE_COLUMNS = {"hashed_password", "password", "email", "jti"}
+# SQLAlchemy names the parameters after the column, e.g. email_1 or jti_m0
+_BIND_SUFFIX = re.compile(r"_m?\d+$")
+
+
+def _truncate(text: str, length: int) -> str:
+    return text if len(text) <= length else text[: length - 3] + "..."
+
+
+def _find_caller() -> str:
+    """Innermost application frame outside of core, e.g. the crud method"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PACKAGE_DIR) and not filename.startswith(CORE_DIR):
+            return (
+                f"{os.path.relpath(filename, os.path.dirname(PACKAGE_DIR))}:"
+                f"{frame.f_lineno} {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return "-"
+
+
+def _is_sensitive(name: str) -> bool:
+    return _BIND_SUFFIX.sub("", name) in SENSITIVE_COLUMNS
+
+
+def redact(parameters, names: Optional[Sequence[str]] = None):
+    """The parameters of one execution, with the values of sensitive columns
+    replaced. Positional parameters are matched with the bind ``names`` of the
+    compiled statement, all of them are replaced without.
+    """
+    if isinstance(parameters, dict):
+        return {
+            name: "***" if _is_sensitive(name) else value
+            for name, value in parameters.items()
+        }
+    if names is None or len(names) != len(parameters):
+        return tuple("***" for value in parameters)
+    return tuple(
+        "***" if _is_sensitive(name) else value
+        for name, value in zip(names, parameters)
+    )
+
+
+class SlowQueryLog:
+    """Log the statements that take longer than ``threshold`` seconds.
+
+    Each record has the route running it (see ``querystats.track_queries``),
+    the application code issuing it, the statement fingerprint, with
+    ``log_parameters`` the parameters (sensitive columns redacted, truncated to
+    ``max_params_length`` characters) and, with ``explain``, the query plan.
+    The plan is read again through a raw cursor, so it is only worth it while
+    looking into a slow query. A threshold of 0 disables the log.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        explain: bool = False,
+        log_parameters: bool = False,
+        max_params_length: int = 200,
+        logger: logging.Logger = slow_query_logger,
+    ):
+        self.threshold = threshold
+        self.explain = explain
+        self.log_parameters = log_parameters
+        self.max_params_length = max_params_length
+        self.logger = logger
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        if self.threshold:
+            context._slow_query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        started_at = getattr(context, "_slow_query_started_at", None)
+        if started_at is None:
+            return
+        duration = time.perf_counter() - started_at
+        if duration >= self.threshold:
+            self.record(conn, statement, parameters, duration, executemany, context)
+
+    def instrument(self, engine: Engine) -> None:
+        if not event.contains(
+            engine, "before_cursor_execute", self._before_cursor_execute
+        ):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def get_plan(self, conn, statement: str, parameters) -> Optional[List[str]]:
+        """Query plan of the statement, None if the database can't tell"""
+        prefix = EXPLAIN.get(conn.dialect.name)
+        if prefix is None:
+            return None
+        # a raw cursor, so it is neither timed nor counted
+        cursor = conn.connection.cursor()
+        # a failed statement aborts the whole PostgreSQL transaction
+        savepoint = conn.dialect.name == "postgresql"
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        finally:
+            cursor.close()
+        # sqlite: (id, parent, notused, detail), postgresql: (line,)
+        return [str(row[-1]) for row in rows]
+
+    def record(
+        self,
+        conn,
+        statement: str,
+        parameters,
+        duration: float,
+        executemany: bool,
+        context=None,
+    ) -> None:
+        stats = get_current()
+        lines = [
+            f"{duration * 1000:.1f}ms {stats.route if stats else '-'} "
+            f"{_find_caller()}",
+            f"  {fingerprint(statement)}",
+        ]
+        if self.log_parameters:
+            compiled = getattr(context, "compiled", None)
+            names = getattr(compiled, "positiontup", None)
+            if executemany:
+                redacted = [redact(params, names) for params in parameters]
+            else:
+                redacted = redact(parameters, names)
+            lines.append(
+                f"  parameters: {_truncate(repr(redacted), self.max_params_length)}"
+            )
+        if self.explain and not executemany:
+            try:
+                plan = self.get_plan(conn, statement, parameters)
+            except Exception as err:
+                lines.append(f"  plan: failed ({err})")
+            else:
+                if plan is not None:
+                    lines.append("  plan:")
+                    lines.extend(f"    {line}" for line in plan)
+        self.logger.warning("\n".join(lines))
+
+
+def add_file_handler(filename: str, max_bytes: int, backups: int) -> None:
+    """Write the slow statements to a rotating file (and nowhere else)"""
+    filename = os.path.abspath(filename)
+    for handler in slow_query_logger.handlers:
+        if getattr(handler, "baseFilename", None) == filename:
+            return
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    handler = RotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backups, delay=True
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.propagate = False
+
+
+slow_query_log = SlowQueryLog(
+    threshold=settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    log_parameters=settings.SLOW_QUERY_LOG_PARAMETERS,
+    max_params_length=settings.SLOW_QUERY_MAX_PARAMS_LENGTH,
+)
@@ -1,9 +1,14 @@
 from typing import Generic, Any, Dict, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
-from sqlmodel import Session
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Insert
+from sqlmodel import Session, SQLModel
 from pydantic import BaseModel
 
+from inquizitor.crud.profiles import is_loaded, load_options
 from inquizitor.db.base_class import PKModel
 
 ModelType = TypeVar("ModelType", bound=PKModel)
@@ -11,6 +16,20 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def get_identity_cache_stats(db: Session) -> Dict[str, int]:
+    """Primary-key lookups served from (hits) or missing (misses) the session"""
+    return db.info.setdefault("identity_cache", {"hits": 0, "misses": 0})
+
+
+def dialect_insert(db: Session, model: Type[SQLModel]) -> Insert:
+    """INSERT into the model's table that supports ``on_conflict_do_*``,
+    for the dialect (PostgreSQL or SQLite) the session is bound to
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model.__table__)
+    return sqlite.insert(model.__table__)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -23,14 +42,47 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        query = db.query(self.model).filter(self.model.id == id).first()
-        return query
+    def get(
+        self, db: Session, id: Any, profile: Optional[str] = None
+    ) -> Optional[ModelType]:
+        """Read by primary key.
+
+        Rows already loaded in the session (i.e. earlier in the same request)
+        are served from its identity map without querying the database again,
+        unless the relationships of the load ``profile`` aren't loaded yet.
+        """
+        obj = db.identity_map.get(identity_key(self.model, id))
+        stats = get_identity_cache_stats(db)
+        if (
+            obj is not None
+            and not inspect(obj).expired
+            and (profile is None or is_loaded(obj, profile))
+        ):
+            stats["hits"] += 1
+            return db.get(self.model, id)
+
+        stats["misses"] += 1
+        if profile is None:
+            return db.get(self.model, id)
+        return db.get(
+            self.model,
+            id,
+            options=load_options(self.model, profile, joined=True),
+            populate_existing=obj is not None,
+        )
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        profile: Optional[str] = None,
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = db.query(self.model)
+        if profile is not None:
+            query = query.options(*load_options(self.model, profile))
+        return query.offset(skip).limit(limit).all()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -45,7 +97,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
         obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
@@ -1,13 +1,137 @@
 import logging
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import case
+from sqlalchemy.sql import Insert
 from sqlmodel import Session
-from typing import List
+from typing import Any, Dict, List, NamedTuple, Union
 
 from inquizitor import crud
-from inquizitor.crud.base import CRUDBase
-from inquizitor.models import QuizAnswer, QuizAnswerCreate, QuizAnswerUpdate
+from inquizitor.crud.base import CRUDBase, dialect_insert
+from inquizitor.models import (
+    QuizAnswer,
+    QuizAnswerBatchItem,
+    QuizAnswerBatchResult,
+    QuizAnswerCreate,
+    QuizAnswerUpdate,
+    QuizAttempt,
+    QuizChoice,
+    QuizQuestion,
+)
+
+
+class Grade(NamedTuple):
+    is_correct: bool
+    points: int
 
 
 class CRUDQuizAnswer(CRUDBase[QuizAnswer, QuizAnswerCreate, QuizAnswerUpdate]):
+    def create(
+        self, db: Session, *, obj_in: Union[QuizAnswerCreate, Dict[str, Any]]
+    ) -> QuizAnswer:
+        """Create an answer, graded against the chosen choice.
+
+        The points it earns are added to the running score of its attempt in
+        the same transaction.
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        is_correct, points = self.grade(db, choice_id=obj_in_data["choice_id"])
+        obj_in_data["is_correct"] = is_correct
+        obj_in_data["points"] = points
+        if obj_in_data.get("attempt_id") and points:
+            crud.quiz_attempt.add_to_score(
+                db, id=obj_in_data["attempt_id"], points=points
+            )
+        return super().create(db, obj_in=obj_in_data)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: QuizAnswer,
+        obj_in: Union[QuizAnswerUpdate, Dict[str, Any]]
+    ) -> QuizAnswer:
+        """Update an answer, graded against the chosen choice.
+
+        The running score of its attempt is adjusted by the difference between
+        the points the answer was awarded and the points it earns now, in the
+        same transaction.
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        is_correct, points = self.grade(
+            db, choice_id=update_data.get("choice_id") or db_obj.choice_id
+        )
+        update_data["is_correct"] = is_correct
+        update_data["points"] = points
+        if db_obj.attempt_id and points != db_obj.points:
+            crud.quiz_attempt.add_to_score(
+                db, id=db_obj.attempt_id, points=points - db_obj.points
+            )
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def _upsert_statement(self, db: Session, rows: List[Dict[str, Any]]) -> Insert:
+        """INSERT the answers, or overwrite the answer an attempt already has for
+        the question (``INSERT ... ON CONFLICT DO UPDATE``), in one statement.
+
+        The rows must not repeat an (attempt, question) pair.
+        """
+        stmt = dialect_insert(db, QuizAnswer).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=["attempt_id", "question_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "content",
+                    "is_correct",
+                    "points",
+                    "student_id",
+                    "choice_id",
+                )
+            },
+        )
+
+    def upsert(self, db: Session, *, obj_in: QuizAnswerCreate) -> QuizAnswer:
+        """Create the answer of the attempt to the question, or replace it.
+
+        Safe against retries and concurrent requests: the unique
+        (attempt_id, question_id) index decides, not a prior SELECT. The running
+        score of the attempt is adjusted in the same transaction, by the points
+        the answer earns minus what the answer it replaces was awarded.
+        """
+        obj_in_data = jsonable_encoder(obj_in, exclude={"id"})
+        grade = self.grade(db, choice_id=obj_in_data["choice_id"])
+        obj_in_data["is_correct"] = grade.is_correct
+        obj_in_data["points"] = grade.points
+        if obj_in_data.get("attempt_id"):
+            crud.quiz_attempt.replace_in_score(
+                db,
+                id=obj_in_data["attempt_id"],
+                question_id=obj_in_data["question_id"],
+                points=grade.points,
+            )
+        db.execute(self._upsert_statement(db, [obj_in_data]))
+        db.commit()
+        return (
+            db.query(QuizAnswer)
+            .populate_existing()
+            .filter(
+                QuizAnswer.attempt_id == obj_in_data["attempt_id"],
+                QuizAnswer.question_id == obj_in_data["question_id"],
+            )
+            .one()
+        )
+
+    def grade(self, db: Session, *, choice_id: int) -> Grade:
+        """Return whether the choice is correct and the points it earns"""
+        choice = crud.quiz_choice.get(db, id=choice_id)
+        if not (choice and choice.is_correct):
+            return Grade(is_correct=False, points=0)
+        question = crud.quiz_question.get(db, id=choice.question_id)
+        return Grade(is_correct=True, points=question.points)
+
     def get_by_question_and_attempt_ids(
         self, db: Session, *, question_id: int, attempt_id: int
     ) -> QuizAnswer:
@@ -21,10 +145,121 @@ class CRUDQuizAnswer(CRUDBase[QuizAnswer, QuizAnswerCreate, QuizAnswerUpdate]):
         )
 
     def get_all_by_attempt(self, db: Session, *, attempt_id: int) -> List[QuizAnswer]:
-        attempt = crud.quiz_attempt.get(db, id=attempt_id)
-        student = crud.user.get(db, id=attempt.student_id)
+        return (
+            db.query(QuizAnswer)
+            .filter(QuizAnswer.attempt_id == attempt_id)
+            .order_by(QuizAnswer.id)
+            .all()
+        )
+
+    def get_multi_by_attempt_ids(
+        self, db: Session, *, attempt_ids: List[int]
+    ) -> Dict[int, List[QuizAnswer]]:
+        """Read answers of all the given attempts, grouped by attempt ID"""
+        answers = {attempt_id: [] for attempt_id in attempt_ids}
+        if not attempt_ids:
+            return answers
+
+        for answer in (
+            db.query(QuizAnswer)
+            .filter(QuizAnswer.attempt_id.in_(attempt_ids))
+            .order_by(QuizAnswer.id)
+            .all()
+        ):
+            answers[answer.attempt_id].append(answer)
+
+        return answers
+
+    def upsert_multi(
+        self, db: Session, *, attempt: QuizAttempt, items: List[QuizAnswerBatchItem]
+    ) -> List[QuizAnswerBatchResult]:
+        """Save a page of answers for the attempt in one transaction.
+
+        All choices are validated with one query, and all answers are written
+        with one ``INSERT ... ON CONFLICT DO UPDATE`` before the running score
+        and recent question are updated and everything is committed once. Items
+        whose choice doesn't belong to the question (or the question to the
+        quiz) are reported as invalid and skipped.
+        """
+        choices = {
+            row.id: row
+            for row in db.query(
+                QuizChoice.id,
+                QuizChoice.question_id,
+                QuizChoice.content,
+                QuizChoice.is_correct,
+                case((QuizChoice.is_correct, QuizQuestion.points), else_=0).label(
+                    "points"
+                ),
+            )
+            .join(QuizQuestion, QuizQuestion.id == QuizChoice.question_id)
+            .filter(
+                QuizQuestion.quiz_id == attempt.quiz_id,
+                QuizChoice.id.in_({item.choice_id for item in items}),
+            )
+        }
+        valid_items = [
+            item
+            for item in items
+            if item.choice_id in choices
+            and choices[item.choice_id].question_id == item.question_id
+        ]
+        question_ids = {item.question_id for item in valid_items}
+
+        def get_answer_ids() -> Dict[int, int]:
+            return dict(
+                db.query(QuizAnswer.question_id, QuizAnswer.id).filter(
+                    QuizAnswer.attempt_id == attempt.id,
+                    QuizAnswer.question_id.in_(question_ids),
+                )
+            )
+
+        existing = get_answer_ids() if valid_items else {}
+        answer_ids = existing
+        if valid_items:
+            # the last item for a question wins
+            rows = {
+                item.question_id: dict(
+                    content=choices[item.choice_id].content,
+                    is_correct=choices[item.choice_id].is_correct,
+                    points=choices[item.choice_id].points,
+                    student_id=attempt.student_id,
+                    choice_id=item.choice_id,
+                    attempt_id=attempt.id,
+                    question_id=item.question_id,
+                )
+                for item in valid_items
+            }
+            db.execute(self._upsert_statement(db, list(rows.values())))
+            crud.quiz_attempt.refresh_score(db, id=attempt.id)
+            attempt.recent_question_id = valid_items[-1].question_id
+            db.add(attempt)
+            if len(existing) < len(rows):
+                answer_ids = get_answer_ids()
+            db.commit()
+
+        results = []
+        seen = set(existing)
+        for item in items:
+            choice = choices.get(item.choice_id)
+            if not (choice and choice.question_id == item.question_id):
+                results.append(
+                    QuizAnswerBatchResult(
+                        **item.dict(),
+                        status="invalid",
+                        detail="Choice does not belong to the specified question",
+                    )
+                )
+                continue
+            status = "updated" if item.question_id in seen else "created"
+            seen.add(item.question_id)
+            results.append(
+                QuizAnswerBatchResult(
+                    **item.dict(), status=status, answer_id=answer_ids[item.question_id]
+                )
+            )
 
-        return [answer for answer in student.answers if answer.attempt_id == attempt.id]
+        return results
 
 
 quiz_answer = CRUDQuizAnswer(QuizAnswer)
@@ -1,11 +1,23 @@
 import logging
+from datetime import datetime
 from pprint import pformat
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import case, func, select, text
+from sqlalchemy.sql import Select
 from sqlmodel import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from inquizitor import crud, models
-from inquizitor.crud.base import CRUDBase
-from inquizitor.models import QuizAttempt, QuizAttemptCreate, QuizAttemptUpdate
+from inquizitor.crud.base import CRUDBase, dialect_insert
+from inquizitor.models import (
+    QuizAnswer,
+    QuizAttempt,
+    QuizAttemptCreate,
+    QuizAttemptUpdate,
+    QuizChoice,
+    QuizQuestion,
+    QuizStudentLink,
+)
 
 
 class CRUDQuizAttempt(CRUDBase[QuizAttempt, QuizAttemptCreate, QuizAttemptUpdate]):
@@ -39,55 +51,307 @@ class CRUDQuizAttempt(CRUDBase[QuizAttempt, QuizAttemptCreate, QuizAttemptUpdate
             .all()
         )
 
-    def get_multi_latest_by_student_id(
-        self, db: Session, *, student_id: int
+    def latest_ids(
+        self, *, quiz_id: Optional[int] = None, student_id: Optional[int] = None
+    ) -> Select:
+        """Select the ID of the latest attempt of every (quiz, student) pair.
+
+        Works on SQLite and PostgreSQL alike, and can be used as a subquery
+        wherever latest attempts have to be filtered or joined.
+        """
+        query = select(func.max(QuizAttempt.id)).group_by(
+            QuizAttempt.quiz_id, QuizAttempt.student_id
+        )
+        if quiz_id is not None:
+            query = query.where(QuizAttempt.quiz_id == quiz_id)
+        if student_id is not None:
+            query = query.where(QuizAttempt.student_id == student_id)
+        return query
+
+    def get_multi_latest(
+        self,
+        db: Session,
+        *,
+        quiz_id: Optional[int] = None,
+        student_id: Optional[int] = None,
     ) -> List[QuizAttempt]:
-        """Read all latest attempts of student for all quizzes taken"""
-        unique_attempts = []
-        attempts = (
+        """Read latest attempts per (quiz, student) pair, newest first"""
+        return (
             db.query(QuizAttempt)
-            .filter(QuizAttempt.student_id == student_id)
+            .filter(
+                QuizAttempt.id.in_(
+                    self.latest_ids(quiz_id=quiz_id, student_id=student_id)
+                )
+            )
             .order_by(QuizAttempt.id.desc())
             .all()
         )
-        for attempt in attempts:
-            if attempt.quiz_id not in [attempt.quiz_id for attempt in unique_attempts]:
-                unique_attempts.append(attempt)
 
-        return unique_attempts
+    def get_multi_latest_by_student_id(
+        self, db: Session, *, student_id: int
+    ) -> List[QuizAttempt]:
+        """Read all latest attempts of student for all quizzes taken"""
+        return self.get_multi_latest(db, student_id=student_id)
 
     def get_multi_latest_by_quiz_id(self, db: Session, *, id: int) -> List[QuizAttempt]:
         """Read all latest student attempts on a given quiz"""
-        unique_attempts = []
-        attempts = (
-            db.query(QuizAttempt)
-            .filter(QuizAttempt.quiz_id == id)
-            .order_by(QuizAttempt.id.desc())
+        return self.get_multi_latest(db, quiz_id=id)
+
+    def get_multi_scores(self, db: Session, *, ids: List[int]) -> Dict[int, int]:
+        """Compute the scores for the given attempt IDs in a single query."""
+        if not ids:
+            return {}
+
+        points = case((QuizChoice.is_correct, QuizQuestion.points), else_=0)
+        rows = (
+            db.query(QuizAnswer.attempt_id, func.coalesce(func.sum(points), 0))
+            .join(QuizChoice, QuizChoice.id == QuizAnswer.choice_id)
+            .join(QuizQuestion, QuizQuestion.id == QuizChoice.question_id)
+            .filter(QuizAnswer.attempt_id.in_(ids))
+            .group_by(QuizAnswer.attempt_id)
             .all()
         )
-        for attempt in attempts:
-            if attempt.student_id not in [
-                attempt.student_id for attempt in unique_attempts
-            ]:
-                unique_attempts.append(attempt)
+        scores = {id: 0 for id in ids}
+        scores.update({attempt_id: score for attempt_id, score in rows})
+        return scores
+
+    def get_scores(self, db: Session, *, attempts: List[QuizAttempt]) -> Dict[int, int]:
+        """Read the scores of the given attempts without writing anything.
 
-        return unique_attempts
+        Materialized scores are used as-is, the rest are computed in bulk.
+        """
+        scores = {
+            attempt.id: attempt.score
+            for attempt in attempts
+            if attempt.score is not None
+        }
+        ungraded = [attempt.id for attempt in attempts if attempt.id not in scores]
+        scores.update(self.get_multi_scores(db, ids=ungraded))
+        return scores
 
     def get_score(self, db: Session, *, id: int) -> int:
-        """Compute the score for the given attempt ID."""
-        attempt = crud.quiz_attempt.get(db, id=id)
-
-        score = 0
-        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
-        for answer in answers:
-            choice = crud.quiz_choice.get(db, id=answer.choice_id)
-            question = crud.quiz_question.get(db, id=choice.question_id)
-            answer_in = models.QuizAnswerUpdate(is_correct=choice.is_correct)
-            answer = crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
-            if answer.is_correct:
-                score += question.points
-
-        return score
+        """Read the score for the given attempt ID."""
+        attempt = self.get(db, id=id)
+        return self.get_scores(db, attempts=[attempt])[id]
+
+    def _grade_answers(self, db: Session, *, ids: List[int]) -> None:
+        """Copy correctness of the chosen choices, and the points it earns, to the
+        answers of the attempts
+        """
+        is_correct = (
+            select(QuizChoice.is_correct)
+            .where(QuizChoice.id == QuizAnswer.choice_id)
+            .scalar_subquery()
+        )
+        points = (
+            select(case((QuizChoice.is_correct, QuizQuestion.points), else_=0))
+            .join(QuizQuestion, QuizQuestion.id == QuizChoice.question_id)
+            .where(QuizChoice.id == QuizAnswer.choice_id)
+            .scalar_subquery()
+        )
+        db.query(QuizAnswer).filter(QuizAnswer.attempt_id.in_(ids)).update(
+            {QuizAnswer.is_correct: is_correct, QuizAnswer.points: points},
+            synchronize_session=False,
+        )
+
+    def get_open_and_link(
+        self, db: Session, *, quiz_id: int, student_id: int
+    ) -> Optional[Tuple[QuizAttempt, QuizStudentLink]]:
+        """Open attempt of the student on the quiz and their link to it, in one
+        SELECT and without writing, or None if either is missing."""
+        return (
+            db.query(QuizAttempt, QuizStudentLink)
+            .populate_existing()
+            .join(
+                QuizStudentLink,
+                (QuizStudentLink.quiz_id == QuizAttempt.quiz_id)
+                & (QuizStudentLink.student_id == QuizAttempt.student_id),
+            )
+            .filter(
+                QuizAttempt.quiz_id == quiz_id,
+                QuizAttempt.student_id == student_id,
+                QuizAttempt.is_done == False,
+            )
+            .first()
+        )
+
+    def create(self, db: Session, *, obj_in: QuizAttemptCreate) -> QuizAttempt:
+        """Create an attempt with a running score of zero"""
+        obj_in_data = jsonable_encoder(obj_in)
+        if obj_in_data.get("score") is None:
+            obj_in_data["score"] = 0
+        return super().create(db, obj_in=obj_in_data)
+
+    def ensure_attempt(
+        self,
+        db: Session,
+        *,
+        quiz_id: int,
+        student_id: int,
+        recent_question_id: Optional[int] = None,
+        update_recent_question: bool = True,
+    ) -> Tuple[QuizAttempt, QuizStudentLink]:
+        """Open attempt of the student on the quiz (a new one if there's none)
+        and their link to the quiz, in one transaction.
+
+        The attempt and the link are upserted against the unique index on open
+        attempts and the link's primary key, so two tabs opening the quiz at
+        once end up with the same attempt instead of racing a SELECT.
+        """
+        stmt = dialect_insert(db, QuizAttempt).values(
+            quiz_id=quiz_id,
+            student_id=student_id,
+            recent_question_id=recent_question_id,
+            is_done=False,
+            started_at=datetime.now(),
+            score=0,
+        )
+        conflict = dict(
+            index_elements=["quiz_id", "student_id"], index_where=text("NOT is_done")
+        )
+        if recent_question_id is not None and update_recent_question:
+            stmt = stmt.on_conflict_do_update(
+                **conflict,
+                set_={"recent_question_id": stmt.excluded.recent_question_id},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(**conflict)
+        db.execute(stmt)
+        crud.quiz_student_link.ensure(db, quiz_id=quiz_id, student_id=student_id)
+        db.commit()
+
+        attempt = (
+            db.query(QuizAttempt)
+            .populate_existing()
+            .filter(
+                QuizAttempt.quiz_id == quiz_id,
+                QuizAttempt.student_id == student_id,
+                QuizAttempt.is_done == False,
+            )
+            .one()
+        )
+        link = crud.quiz_student_link.get(db, id=(quiz_id, student_id))
+        return (attempt, link)
+
+    def add_to_score(self, db: Session, *, id: int, points: int) -> None:
+        """Add points to the running score of the attempt.
+
+        Does not commit, so that the change lands in the caller's transaction.
+        Attempts without a running score are left alone.
+        """
+        db.query(QuizAttempt).filter(
+            QuizAttempt.id == id, QuizAttempt.score.isnot(None)
+        ).update(
+            {QuizAttempt.score: QuizAttempt.score + points},
+            synchronize_session=False,
+        )
+
+    def replace_in_score(
+        self, db: Session, *, id: int, question_id: int, points: int
+    ) -> None:
+        """Add the points of an answer to the question to the running score of
+        the attempt, minus what the answer it replaces was awarded.
+
+        Call it before writing the answer. The attempt row is locked first, so
+        that concurrent answers to the attempt take turns, and the replaced
+        points are read in the same UPDATE. Does not commit, attempts without
+        a running score are left alone.
+        """
+        db.query(QuizAttempt.id).filter(QuizAttempt.id == id).with_for_update().first()
+        replaced = (
+            select(func.coalesce(func.sum(QuizAnswer.points), 0))
+            .where(
+                QuizAnswer.attempt_id == QuizAttempt.id,
+                QuizAnswer.question_id == question_id,
+            )
+            .scalar_subquery()
+        )
+        db.query(QuizAttempt).filter(
+            QuizAttempt.id == id, QuizAttempt.score.isnot(None)
+        ).update(
+            {QuizAttempt.score: QuizAttempt.score + points - replaced},
+            synchronize_session=False,
+        )
+
+    def refresh_score(self, db: Session, *, id: int) -> None:
+        """Recompute the running score of the attempt from the points its
+        answers were awarded.
+
+        Used after writing many answers at once. Does not commit, attempts
+        without a running score are left alone.
+        """
+        awarded = (
+            select(func.coalesce(func.sum(QuizAnswer.points), 0))
+            .where(QuizAnswer.attempt_id == QuizAttempt.id)
+            .scalar_subquery()
+        )
+        db.query(QuizAttempt).filter(
+            QuizAttempt.id == id, QuizAttempt.score.isnot(None)
+        ).update({QuizAttempt.score: awarded}, synchronize_session=False)
+
+    def finish(self, db: Session, *, db_obj: QuizAttempt) -> QuizAttempt:
+        """Close the attempt, its running score becomes the final score"""
+        if db_obj.score is None:
+            self._grade_answers(db, ids=[db_obj.id])
+            db_obj.score = self.get_multi_scores(db, ids=[db_obj.id])[db_obj.id]
+        db_obj.is_done = True
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def _score_subquery(self):
+        """Points earned by the answers of the attempt being selected/updated"""
+        points = case((QuizChoice.is_correct, QuizQuestion.points), else_=0)
+        return (
+            select(func.coalesce(func.sum(points), 0))
+            .select_from(QuizAnswer)
+            .join(QuizChoice, QuizChoice.id == QuizAnswer.choice_id)
+            .join(QuizQuestion, QuizQuestion.id == QuizChoice.question_id)
+            .where(QuizAnswer.attempt_id == QuizAttempt.id)
+            .scalar_subquery()
+        )
+
+    def get_multi_score_drift(
+        self, db: Session, *, quiz_id: Optional[int] = None
+    ) -> List[Tuple[int, int, int]]:
+        """Recompute stored scores in bulk and return (attempt ID, stored score,
+        computed score) for every attempt whose stored score drifted.
+        """
+        computed = self._score_subquery()
+        query = db.query(QuizAttempt.id, QuizAttempt.score, computed).filter(
+            QuizAttempt.score.isnot(None), QuizAttempt.score != computed
+        )
+        if quiz_id is not None:
+            query = query.filter(QuizAttempt.quiz_id == quiz_id)
+        return [tuple(row) for row in query.order_by(QuizAttempt.id).all()]
+
+    def regrade(
+        self,
+        db: Session,
+        *,
+        quiz_id: Optional[int] = None,
+        ids: Optional[List[int]] = None,
+    ) -> int:
+        """Grade answers again and refresh stored scores, e.g. after a teacher
+        changes which choice is correct. Only the attempts of the quiz, or with
+        the given IDs, if filtered. Returns the number of attempts regraded.
+        """
+        query = db.query(QuizAttempt.id)
+        if quiz_id is not None:
+            query = query.filter(QuizAttempt.quiz_id == quiz_id)
+        if ids is not None:
+            query = query.filter(QuizAttempt.id.in_(ids))
+        ids = [id for id, in query.all()]
+        if not ids:
+            return 0
+
+        self._grade_answers(db, ids=ids)
+        db.query(QuizAttempt).filter(
+            QuizAttempt.id.in_(ids), QuizAttempt.score.isnot(None)
+        ).update({QuizAttempt.score: self._score_subquery()}, synchronize_session=False)
+        db.commit()
+
+        return len(ids)
 
 
 quiz_attempt = CRUDQuizAttempt(QuizAttempt)
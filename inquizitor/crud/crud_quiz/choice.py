@@ -1,11 +1,20 @@
 from sqlmodel import Session
+from typing import Optional
 
 from inquizitor.crud.base import CRUDBase
 from inquizitor.models import QuizChoice, QuizChoiceCreate, QuizChoiceUpdate
 
 
 class CRUDQuizChoice(CRUDBase[QuizChoice, QuizChoiceCreate, QuizChoiceUpdate]):
-    pass
+    def get_by_question(
+        self, db: Session, *, id: int, question_id: int
+    ) -> Optional[QuizChoice]:
+        """Read choice by id, only if it belongs to the given question"""
+        return (
+            db.query(QuizChoice)
+            .filter(QuizChoice.id == id, QuizChoice.question_id == question_id)
+            .first()
+        )
 
 
 quiz_choice = CRUDQuizChoice(QuizChoice)
@@ -1,6 +1,6 @@
 from sqlmodel import Session
 
-from inquizitor.crud.base import CRUDBase
+from inquizitor.crud.base import CRUDBase, dialect_insert
 from inquizitor.models import (
     QuizStudentLink,
     QuizStudentLinkCreate,
@@ -23,5 +23,17 @@ class CRUDQuizStudentLink(
             .first()
         )
 
+    def ensure(self, db: Session, *, quiz_id: int, student_id: int) -> None:
+        """Link the student to the quiz unless they already are.
+
+        A single ``INSERT ... ON CONFLICT DO NOTHING``, which does not commit so
+        that it lands in the caller's transaction.
+        """
+        db.execute(
+            dialect_insert(db, QuizStudentLink)
+            .values(quiz_id=quiz_id, student_id=student_id)
+            .on_conflict_do_nothing(index_elements=["quiz_id", "student_id"])
+        )
+
 
 quiz_student_link = CRUDQuizStudentLink(QuizStudentLink)
@@ -1,16 +1,34 @@
 from sqlmodel import Session
+from typing import Optional
 
 from inquizitor.crud.base import CRUDBase
-from inquizitor.models import QuizQuestion, QuizQuestionCreate, QuizQuestionUpdate
+from inquizitor.crud.profiles import load_options
+from inquizitor.models import (
+    QuizChoice,
+    QuizQuestion,
+    QuizQuestionCreate,
+    QuizQuestionUpdate,
+)
 
 
 class CRUDQuizQuestion(CRUDBase[QuizQuestion, QuizQuestionCreate, QuizQuestionUpdate]):
+    def get_by_quiz(
+        self, db: Session, *, id: int, quiz_id: int, profile: Optional[str] = None
+    ) -> Optional[QuizQuestion]:
+        """Read question by id, only if it belongs to the given quiz"""
+        query = db.query(QuizQuestion).filter(
+            QuizQuestion.id == id, QuizQuestion.quiz_id == quiz_id
+        )
+        if profile is not None:
+            query = query.options(*load_options(QuizQuestion, profile, joined=True))
+        return query.first()
+
     def has_choice(self, db: Session, question_id: int, choice_id: int) -> bool:
         """Verify if the question has the given choice, by id"""
-        question = self.get(db, question_id)
-        choice_ids = [choice.id for choice in question.choices]
-
-        return choice_id in choice_ids
+        query = db.query(QuizChoice.id).filter(
+            QuizChoice.id == choice_id, QuizChoice.question_id == question_id
+        )
+        return db.query(query.exists()).scalar()
 
 
 quiz_question = CRUDQuizQuestion(QuizQuestion)
@@ -3,13 +3,14 @@ import random
 import string
 from pprint import pformat
 from sqlmodel import Session
-from typing import List, Union
+from typing import List, Optional, Union
 
 from fastapi.encoders import jsonable_encoder
 
 from inquizitor import crud, models
 from inquizitor.crud.base import CRUDBase
-from inquizitor.models import Quiz, QuizCreate, QuizUpdate
+from inquizitor.crud.profiles import load_options
+from inquizitor.models import Quiz, QuizCreate, QuizQuestion, QuizUpdate, User
 
 
 class CRUDQuiz(CRUDBase[Quiz, QuizCreate, QuizUpdate]):
@@ -56,25 +57,32 @@ class CRUDQuiz(CRUDBase[Quiz, QuizCreate, QuizUpdate]):
 
     def get_multi_by_participant(
         self, db: Session, *, student: models.User, skip: int = 0, limit: int = 100
-    ) -> List[Quiz]:
+    ) -> List[dict]:
         """Read quizzes answered by the student."""
 
-        quizzes = []
         unique_attempts = crud.quiz_attempt.get_multi_latest_by_student_id(
             db, student_id=student.id
         )
+        attempt_ids = [attempt.id for attempt in unique_attempts]
+        scores = crud.quiz_attempt.get_scores(db, attempts=unique_attempts)
+        answers = crud.quiz_answer.get_multi_by_attempt_ids(db, attempt_ids=attempt_ids)
+        quizzes_in_db = {
+            quiz.id: quiz
+            for quiz in db.query(Quiz)
+            .options(*load_options(Quiz, "quiz_with_questions"))
+            .filter(Quiz.id.in_({attempt.quiz_id for attempt in unique_attempts}))
+            .all()
+        }
+
+        quizzes = []
         for attempt in unique_attempts:
-            quiz_in_db = crud.quiz.get(db, id=attempt.quiz_id)
+            quiz_in_db = quizzes_in_db[attempt.quiz_id]
 
             quiz = jsonable_encoder(quiz_in_db)
             quiz["questions"] = quiz_in_db.questions
-            quiz["answers"] = jsonable_encoder(
-                crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
-            )
-            quiz["score"] = crud.quiz_attempt.get_score(db, id=attempt.id)
-            quiz["participant_name"] = crud.user.get(
-                db, id=attempt.student_id
-            ).full_name
+            quiz["answers"] = jsonable_encoder(answers[attempt.id])
+            quiz["score"] = scores[attempt.id]
+            quiz["participant_name"] = student.full_name
 
             quizzes.append(quiz)
 
@@ -82,43 +90,68 @@ class CRUDQuiz(CRUDBase[Quiz, QuizCreate, QuizUpdate]):
 
     def get_multi_results_by_quiz_id(
         self, db: Session, *, id: int, skip: int = 0, limit: int = 100
-    ) -> List[models.QuizReadWithQuestions]:
-        """Read results for the quiz"""
+    ) -> List[dict]:
+        """Read results for the quiz
+
+        The quiz and its questions are loaded and serialized once, and the
+        answers, scores and participant names of all latest attempts are
+        fetched in bulk, so the number of queries does not depend on the
+        number of participants or questions.
+        """
 
-        quizzes = []
         unique_attempts = crud.quiz_attempt.get_multi_latest_by_quiz_id(db, id=id)
+        attempt_ids = [attempt.id for attempt in unique_attempts]
+        scores = crud.quiz_attempt.get_scores(db, attempts=unique_attempts)
+
+        quiz_in_db = (
+            db.query(Quiz)
+            .options(*load_options(Quiz, "quiz_with_questions", joined=True))
+            .filter(Quiz.id == id)
+            .first()
+        )
+        quiz = jsonable_encoder(quiz_in_db)
+        quiz["questions"] = jsonable_encoder(quiz_in_db.questions)
+
+        answers = crud.quiz_answer.get_multi_by_attempt_ids(db, attempt_ids=attempt_ids)
+
+        student_ids = {attempt.student_id for attempt in unique_attempts}
+        names = dict(
+            db.query(User.id, User.full_name).filter(User.id.in_(student_ids)).all()
+        )
+
+        quizzes = []
         for attempt in unique_attempts:
-            quiz_in_db = crud.quiz.get(db, id=id)
-            quiz = jsonable_encoder(quiz_in_db)
-            quiz["questions"] = quiz_in_db.questions
-            quiz["answers"] = jsonable_encoder(
-                crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
-            )
-            quiz["score"] = crud.quiz_attempt.get_score(db, id=attempt.id)
-            quiz["participant_name"] = crud.user.get(
-                db, id=attempt.student_id
-            ).full_name
-            quizzes.append(quiz)
+            result = dict(quiz)
+            result["answers"] = jsonable_encoder(answers[attempt.id])
+            result["score"] = scores[attempt.id]
+            result["participant_name"] = names.get(attempt.student_id)
+            quizzes.append(result)
 
         return quizzes
 
     def get_multi_by_author(
-        self, db: Session, *, teacher_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        teacher_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        profile: Optional[str] = None,
     ) -> List[Quiz]:
-        """Read quizzes participated by the student."""
-        return (
-            db.query(Quiz)
-            .filter(Quiz.teacher_id == teacher_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        """Read quizzes created by the teacher."""
+        query = db.query(Quiz).filter(Quiz.teacher_id == teacher_id)
+        if profile is not None:
+            query = query.options(*load_options(Quiz, profile))
+        return query.offset(skip).limit(limit).all()
 
     def has_question(self, db: Session, quiz_index: Union[int, str], question_id: int):
         """Verify if question belongs to the quiz"""
-        quiz = self.get_by_index(db, quiz_index)
-        question_ids = [question.id for question in quiz.questions]
-        return question_id in question_ids
+        query = db.query(QuizQuestion.id).filter(QuizQuestion.id == question_id)
+        if isinstance(quiz_index, str):
+            query = query.join(Quiz).filter(Quiz.quiz_code == quiz_index)
+        else:
+            query = query.filter(QuizQuestion.quiz_id == quiz_index)
+        return db.query(query.exists()).scalar()
 
     def is_author(self, db: Session, user_id: int, quiz_index: Union[int, str]):
         quiz = self.get_by_index(db, quiz_index)
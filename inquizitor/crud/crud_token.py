@@ -1,34 +1,110 @@
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_
 from sqlmodel import Session
 from fastapi import Depends
 
 from inquizitor import models
 from inquizitor.api import deps
+from inquizitor.core.config import settings
+from inquizitor.core.denylist import denylist
 
 
 class CRUDToken:
-    def revoke_access(self, authorize, db: Session):
-
-        jti = authorize.get_raw_jwt()["jti"]
-        db_obj = models.RevokedToken(jti=jti)
-
-        # TODO add the default token expiry (see core.config)
-        # to remove token from denylist automatically
-
+    def revoke(self, db: Session, *, jti: str, exp: Optional[float] = None):
+        """Store the revoked token, then add it to the in-memory denylist"""
+        if exp is None:
+            # without an expiry it couldn't be purged, deny it as long as the
+            # longest token (a refresh token) lives
+            exp = time.time() + settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+        expires_at = datetime.utcfromtimestamp(exp)
+        db_obj = models.RevokedToken(jti=jti, expires_at=expires_at)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        denylist.add(jti, exp)
+        return db_obj
+
+    def revoke_access(self, authorize, db: Session):
+        raw_jwt = authorize.get_raw_jwt()
+        return self.revoke(db, jti=raw_jwt["jti"], exp=raw_jwt.get("exp"))
 
     def revoke_refresh(self, authorize, db: Session):
+        raw_jwt = authorize.get_raw_jwt()
+        return self.revoke(db, jti=raw_jwt["jti"], exp=raw_jwt.get("exp"))
 
-        jti = authorize.get_raw_jwt()["jti"]
-        db_obj = models.RevokedToken(jti=jti)
+    @staticmethod
+    def _timestamp(expires_at: Optional[datetime]) -> float:
+        """Expiry of a revoked token, rows without one (migration 0004
+        backfills them) are assumed to live as long as the longest token (a
+        refresh token) from now
+        """
+        if expires_at is None:
+            return time.time() + settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+        return (expires_at - datetime(1970, 1, 1)).total_seconds()
 
-        # TODO add the default token expiry (see core.config)
-        # to remove token from denylist automatically
+    def get_multi_unexpired(self, db: Session) -> List[Tuple[str, float]]:
+        """(jti, exp) of revoked tokens that are not expired yet"""
+        rows = db.query(models.RevokedToken.jti, models.RevokedToken.expires_at).filter(
+            or_(
+                models.RevokedToken.expires_at == None,
+                models.RevokedToken.expires_at > datetime.utcnow(),
+            )
+        )
+        return [(jti, self._timestamp(expires_at)) for jti, expires_at in rows]
 
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+    def is_revoked(self, db: Session, *, jti: str) -> bool:
+        """Whether the token was revoked, by this process or another one.
+
+        Tokens missing from the in-memory denylist are looked up in the
+        database, at most once per ``DENYLIST_RECHECK_SECONDS``.
+        """
+        if denylist.is_revoked(jti):
+            return True
+        if denylist.was_checked(jti):
+            return False
+        row = (
+            db.query(models.RevokedToken.expires_at)
+            .filter(models.RevokedToken.jti == jti)
+            .first()
+        )
+        if row is None:
+            denylist.mark_checked(jti)
+            return False
+        denylist.add(jti, self._timestamp(row.expires_at))
+        return True
+
+    def load_denylist(self, db: Session) -> int:
+        """Warm the in-memory denylist from the database"""
+        return denylist.load(self.get_multi_unexpired(db))
+
+    def purge_expired(self, db: Session, *, chunk_size: int = 1000) -> int:
+        """Delete revoked tokens past their expiry, returns how many were deleted.
+
+        Rows are deleted and committed in chunks so no lock is held for long.
+        """
+        now = datetime.utcnow()
+        count = 0
+        while True:
+            ids = [
+                id
+                for id, in db.query(models.RevokedToken.id)
+                .filter(models.RevokedToken.expires_at <= now)
+                .limit(chunk_size)
+            ]
+            if not ids:
+                break
+            db.query(models.RevokedToken).filter(
+                models.RevokedToken.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+            count += len(ids)
+            if len(ids) < chunk_size:
+                break
+        denylist.prune()
+        return count
 
 
 token = CRUDToken()
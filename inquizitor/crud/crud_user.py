@@ -2,12 +2,31 @@ from sqlmodel import select, Session
 
 from typing import Dict, Any, Optional, Union
 
-from inquizitor.core.security import get_password_hash, verify_password
+from inquizitor.core.cache import TTLCache
+from inquizitor.core.config import settings
+from inquizitor.core.security import get_password_hash, verify_and_update_password
 from inquizitor.crud.base import CRUDBase
-from inquizitor.models.user import User, UserCreate, UserUpdate
+from inquizitor.models.user import User, UserCreate, UserSnapshot, UserUpdate
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def __init__(self, model):
+        super().__init__(model)
+        self.snapshots = TTLCache(
+            ttl=settings.USER_CACHE_TTL_SECONDS, maxsize=settings.USER_CACHE_SIZE
+        )
+
+    def get_snapshot(self, db: Session, id: Any) -> Optional[UserSnapshot]:
+        """Read a user from the snapshot cache, loading it on a miss"""
+        snapshot = self.snapshots.get(id)
+        if snapshot is None:
+            user = self.get(db, id=id)
+            if not user:
+                return None
+            snapshot = UserSnapshot.from_orm(user)
+            self.snapshots.set(id, snapshot)
+        return snapshot
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
@@ -40,7 +59,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        self.snapshots.pop(user.id)
+        return user
 
     def authenticate(
         self, db: Session, *, username: str, password: str
@@ -49,9 +70,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
 
+        # the hash policy changed since it was stored (see settings.PASSWORD_SCHEMES)
+        if new_hash:
+            user.hashed_password = new_hash
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+
         return user
 
     def is_superuser(self, user: User) -> bool:
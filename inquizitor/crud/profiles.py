@@ -0,0 +1,72 @@
+from typing import Dict, List, Tuple, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Load, joinedload, selectinload
+from sqlmodel import SQLModel
+
+from inquizitor.models import Quiz, QuizQuestion
+
+# Named sets of relationships to eager-load, as dotted paths from the model.
+# Endpoints pick the profile matching what their response_model serializes,
+# so the relationships are not lazy-loaded one row at a time.
+LOAD_PROFILES: Dict[str, Tuple[Type[SQLModel], Tuple[str, ...]]] = {
+    # QuizReadWithQuestions
+    "quiz_with_questions": (Quiz, ("questions",)),
+    "quiz_with_questions_and_choices": (Quiz, ("questions.choices",)),
+    # QuizQuestionReadWithChoices
+    "question_with_choices": (QuizQuestion, ("choices",)),
+}
+
+
+def _get_paths(model: Type[SQLModel], profile: str) -> Tuple[str, ...]:
+    if profile not in LOAD_PROFILES:
+        raise ValueError(f"Unknown load profile {profile!r}")
+    profile_model, paths = LOAD_PROFILES[profile]
+    if profile_model is not model:
+        raise ValueError(
+            f"Load profile {profile!r} is for {profile_model.__name__}, "
+            f"not {model.__name__}"
+        )
+    return paths
+
+
+def load_options(
+    model: Type[SQLModel], profile: str, *, joined: bool = False
+) -> List[Load]:
+    """Loader options for the profile.
+
+    With ``joined`` the relationships are loaded with JOINs in the same query,
+    which suits a single row. Otherwise every level takes one extra
+    ``SELECT ... IN`` whatever the number of rows, which suits lists.
+    """
+    strategy = joinedload if joined else selectinload
+    options = []
+    for path in _get_paths(model, profile):
+        cls, option = model, None
+        for name in path.split("."):
+            attr = getattr(cls, name)
+            if option is None:
+                option = strategy(attr)
+            else:
+                option = getattr(option, strategy.__name__)(attr)
+            cls = attr.property.mapper.class_
+        options.append(option)
+    return options
+
+
+def is_loaded(obj: SQLModel, profile: str) -> bool:
+    """Whether every relationship of the profile is already loaded on obj"""
+    for path in _get_paths(type(obj), profile):
+        objs = [obj]
+        for name in path.split("."):
+            related = []
+            for parent in objs:
+                if name in inspect(parent).unloaded:
+                    return False
+                value = getattr(parent, name)
+                if isinstance(value, list):
+                    related.extend(value)
+                elif value is not None:
+                    related.append(value)
+            objs = related
+    return True
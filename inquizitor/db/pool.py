@@ -0,0 +1,35 @@
+import logging
+import time
+
+from sqlalchemy.pool import QueuePool
+
+from inquizitor.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that logs how long a checkout waited for a connection.
+
+    Slow checkouts and checkouts that leave no spare connection (saturation)
+    are logged as warnings, the rest at debug level.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        conn = super()._do_get()
+        wait_ms = (time.perf_counter() - start) * 1000
+
+        checked_out = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        if wait_ms >= settings.DB_POOL_SLOW_CHECKOUT_MS or checked_out >= capacity:
+            logger.warning(
+                f"Pool checkout waited {wait_ms:.1f}ms, "
+                f"{checked_out}/{capacity} connections in use"
+            )
+        else:
+            logger.debug(
+                f"Pool checkout waited {wait_ms:.1f}ms, "
+                f"{checked_out}/{capacity} connections in use"
+            )
+        return conn
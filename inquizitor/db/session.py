@@ -2,9 +2,11 @@ from sqlmodel import Session, create_engine
 from sqlmodel.pool import StaticPool
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
 from sqlite3 import Connection as SQLite3Connection
 
 from inquizitor.core.config import settings
+from inquizitor.db.pool import TimedQueuePool
 
 # sqlite cascade delete https://github.com/tiangolo/sqlmodel/issues/213
 @event.listens_for(Engine, "connect")
@@ -20,20 +22,24 @@ if settings.USE_SQLITE:
         settings.SQLALCHEMY_DATABASE_URI, connect_args={"check_same_thread": False}
     )
 else:
-    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+    engine = create_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
 
 test_engine = create_engine(
     "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
 
 
-def SessionLocal():
-    with Session(engine) as session:
-        # https://sqlmodel.tiangolo.com/tutorial/fastapi/tests/#fastapi-application
-        # NOTE: above uses 'yield' instead of 'return'
-        # i get errors with yield & currently i dont understand
-        # same goes for below
-        return session
+# each call returns a new session, the caller is responsible for closing it
+# (see deps.get_db for the per-request lifecycle)
+SessionLocal = sessionmaker(class_=Session, bind=engine)
 
 
 # def TestSession():
@@ -0,0 +1,31 @@
+"""answer attempt question index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 18:13:50.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_quizanswer_attempt_id_question_id",
+            ["attempt_id", "question_id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.drop_index("ix_quizanswer_attempt_id_question_id")
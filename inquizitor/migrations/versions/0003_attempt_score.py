@@ -0,0 +1,28 @@
+"""attempt score
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 18:13:51.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL scores are computed from the answers when the attempt is read
+    with op.batch_alter_table("quizattempt", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("score", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("quizattempt", schema=None) as batch_op:
+        batch_op.drop_column("score")
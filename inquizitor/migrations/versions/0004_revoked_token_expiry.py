@@ -0,0 +1,47 @@
+"""revoked token expiry
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:13:52.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from inquizitor.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("revokedtoken", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("expires_at", sa.DateTime(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_revokedtoken_expires_at"), ["expires_at"], unique=False
+        )
+
+    # tokens revoked before this don't know their expiry, they are kept for as
+    # long as the longest token (a refresh token) lives from now
+    revokedtoken = sa.table("revokedtoken", sa.column("expires_at", sa.DateTime()))
+    op.execute(
+        revokedtoken.update()
+        .where(revokedtoken.c.expires_at == None)
+        .values(
+            expires_at=datetime.utcnow()
+            + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("revokedtoken", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_revokedtoken_expires_at"))
+        batch_op.drop_column("expires_at")
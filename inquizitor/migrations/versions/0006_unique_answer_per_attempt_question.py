@@ -0,0 +1,44 @@
+"""unique answer per attempt question
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:18:28.195274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep the latest of any duplicate answers so the unique index can be built
+    op.execute(
+        "DELETE FROM quizanswer "
+        "WHERE attempt_id IS NOT NULL AND question_id IS NOT NULL "
+        "AND id NOT IN (SELECT max(id) FROM quizanswer "
+        "GROUP BY attempt_id, question_id)"
+    )
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.drop_index("ix_quizanswer_attempt_id_question_id")
+        batch_op.create_index(
+            "ix_quizanswer_attempt_id_question_id",
+            ["attempt_id", "question_id"],
+            unique=True,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.drop_index("ix_quizanswer_attempt_id_question_id")
+        batch_op.create_index(
+            "ix_quizanswer_attempt_id_question_id",
+            ["attempt_id", "question_id"],
+            unique=False,
+        )
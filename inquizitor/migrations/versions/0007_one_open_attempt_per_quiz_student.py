@@ -0,0 +1,41 @@
+"""one open attempt per quiz student
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:22:43.075008
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # attempts without is_done count as open, then only the latest open attempt
+    # of a student on a quiz stays open so the unique index can be built
+    op.execute("UPDATE quizattempt SET is_done = false WHERE is_done IS NULL")
+    op.execute(
+        "UPDATE quizattempt SET is_done = true "
+        "WHERE NOT is_done AND id NOT IN (SELECT max(id) FROM quizattempt "
+        "WHERE NOT is_done GROUP BY quiz_id, student_id)"
+    )
+    with op.batch_alter_table("quizattempt", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_quizattempt_quiz_id_student_id_open",
+            ["quiz_id", "student_id"],
+            unique=True,
+            postgresql_where=sa.text("NOT is_done"),
+            sqlite_where=sa.text("NOT is_done"),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("quizattempt", schema=None) as batch_op:
+        batch_op.drop_index("ix_quizattempt_quiz_id_student_id_open")
@@ -0,0 +1,36 @@
+"""answer points
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 19:05:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("points", sa.Integer(), nullable=False, server_default="0")
+        )
+    # what the answers were awarded is what is_correct recorded when they were saved
+    op.execute(
+        "UPDATE quizanswer SET points = (SELECT quizquestion.points "
+        "FROM quizchoice JOIN quizquestion ON quizquestion.id = quizchoice.question_id "
+        "WHERE quizchoice.id = quizanswer.choice_id) "
+        "WHERE is_correct"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("quizanswer", schema=None) as batch_op:
+        batch_op.drop_column("points")
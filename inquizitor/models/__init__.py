@@ -1,6 +1,8 @@
 from .msg import Msg
 from .quiz import (
     QuizAnswer,
+    QuizAnswerBatchItem,
+    QuizAnswerBatchResult,
     QuizAnswerCreate,
     QuizAnswerUpdate,
     QuizReadWithQuestions,
@@ -22,7 +24,7 @@ from .quiz import (
     QuizUpdate,
 )
 from .token import Token, TokenPayload, RevokedToken
-from .user import User, UserCreate, UserUpdate, ShowUser
+from .user import User, UserCreate, UserUpdate, ShowUser, UserSnapshot
 
 
 """ SQLMODEL BOILERPLATE
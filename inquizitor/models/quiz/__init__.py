@@ -1,4 +1,10 @@
-from .answer import QuizAnswer, QuizAnswerCreate, QuizAnswerUpdate
+from .answer import (
+    QuizAnswer,
+    QuizAnswerBatchItem,
+    QuizAnswerBatchResult,
+    QuizAnswerCreate,
+    QuizAnswerUpdate,
+)
 from .attempt import QuizAttempt, QuizAttemptCreate, QuizAttemptUpdate
 from .choice import QuizChoice, QuizChoiceCreate, QuizChoiceUpdate
 from .link import QuizStudentLink, QuizStudentLinkCreate, QuizStudentLinkUpdate
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from inquizitor.db.base_class import PKModel
 from .choice import QuizChoice
@@ -32,9 +33,35 @@ class QuizAnswerInDBBase(QuizAnswerBase, PKModel):
 
 
 class QuizAnswer(QuizAnswerInDBBase, table=True):
+    # points awarded when the answer was saved, taken back from the running
+    # score when it's changed (the choice may have been regraded since)
+    points: int = 0
+
+    # one answer per question of an attempt, see crud.quiz_answer.upsert
+    __table_args__ = (
+        Index(
+            "ix_quizanswer_attempt_id_question_id",
+            "attempt_id",
+            "question_id",
+            unique=True,
+        ),
+    )
+
     student: Optional[User] = Relationship(back_populates="answers")
     choice: Optional[QuizChoice] = Relationship(back_populates="answers")
     attempt: Optional["QuizAttempt"] = Relationship(back_populates="answers")
 
     def __repr__(self):
         return f"<Answer({self.content!r})>"
+
+
+# Bulk submission (see crud.quiz_answer.upsert_multi)
+class QuizAnswerBatchItem(SQLModel):
+    question_id: int
+    choice_id: int
+
+
+class QuizAnswerBatchResult(QuizAnswerBatchItem):
+    status: str  # created, updated or invalid
+    answer_id: Optional[int] = None
+    detail: Optional[str] = None
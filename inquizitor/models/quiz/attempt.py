@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional, List
 
@@ -14,9 +15,11 @@ class QuizAttemptBase(SQLModel):
     recent_question_id: Optional[int] = Field(
         default=None, foreign_key="quizquestion.id"
     )
-    student_id: int = Field(foreign_key="user.id")
+    student_id: int = Field(foreign_key="user.id", index=True)
     quiz_id: int = Field(foreign_key="quiz.id")
     started_at: datetime = Field(default=datetime.now())
+    # running score, kept up to date as answers are saved (see crud.quiz_answer)
+    score: Optional[int] = None
 
 
 class QuizAttemptCreate(QuizAttemptBase):
@@ -28,6 +31,7 @@ class QuizAttemptUpdate(QuizAttemptBase):
     recent_question_id: Optional[int] = None
     student_id: Optional[int] = None
     quiz_id: Optional[int] = None
+    score: Optional[int] = None
 
 
 class QuizAttemptInDBBase(QuizAttemptBase, PKModel):
@@ -35,6 +39,21 @@ class QuizAttemptInDBBase(QuizAttemptBase, PKModel):
 
 
 class QuizAttempt(QuizAttemptInDBBase, table=True):
+    # latest attempt of a student per quiz, see crud.quiz_attempt.latest_ids
+    # a student has at most one open attempt per quiz, see
+    # crud.quiz_attempt.ensure_attempt
+    __table_args__ = (
+        Index("ix_quizattempt_quiz_id_student_id_id", "quiz_id", "student_id", "id"),
+        Index(
+            "ix_quizattempt_quiz_id_student_id_open",
+            "quiz_id",
+            "student_id",
+            unique=True,
+            postgresql_where=text("NOT is_done"),
+            sqlite_where=text("NOT is_done"),
+        ),
+    )
+
     recent_question: Optional[QuizQuestion] = Relationship(back_populates="attempts")
     student: Optional[User] = Relationship(back_populates="attempts")
     quiz: Optional[Quiz] = Relationship(back_populates="attempts")
@@ -7,7 +7,9 @@ from inquizitor.db.base_class import PKModel
 class QuizChoiceBase(SQLModel):
     content: str = Field(max_length=50)
     is_correct: bool
-    question_id: Optional[int] = Field(default=None, foreign_key="quizquestion.id")
+    question_id: Optional[int] = Field(
+        default=None, foreign_key="quizquestion.id", index=True
+    )
 
 
 class QuizChoiceCreate(QuizChoiceBase):
@@ -7,7 +7,7 @@ class QuizQuestionBase(SQLModel):
     content: str = Field(max_length=200)
     points: int
     order: int
-    quiz_id: Optional[int] = Field(default=None, foreign_key="quiz.id")
+    quiz_id: Optional[int] = Field(default=None, foreign_key="quiz.id", index=True)
 
 
 class QuizQuestionCreate(QuizQuestionBase):
@@ -9,15 +9,16 @@ from inquizitor.models.user import User
 from sqlmodel import Field, Relationship, SQLModel
 from sqlalchemy import Column, String
 
+
 # Shared Properties
 class QuizBase(SQLModel):
-    name: Optional[str] = Field(default=None, max_length=50)
+    name: Optional[str] = Field(default=None, max_length=50, index=True)
     desc: Optional[str] = Field(default=None, max_length=500)
     number_of_questions: int = 1
     created_at: datetime = Field(default=datetime.now())
     due_date: Optional[datetime] = None
     quiz_code: str = Field(default=None, sa_column=Column(String, unique=True))
-    teacher_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    teacher_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
 
 
 # Properties to receive via API on creation
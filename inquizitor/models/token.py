@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from sqlmodel import Field, SQLModel
 
@@ -9,6 +10,8 @@ class RevokedToken(SQLModel, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     jti: str = Field(index=True)
+    # expiry of the revoked token itself (UTC), rows past it can be purged
+    expires_at: Optional[datetime] = Field(default=None, index=True)
     # This could be made more complex, for example storing the token in Redis
     # with the value true if revoked and false if not revoked
 
@@ -67,3 +67,9 @@ class User(UserInDBBase, table=True):
 # Additional Properties to return via API
 class ShowUser(UserInDBBase):
     pass
+
+
+# Read-only copy of a user, cached between requests (see crud.user.get_snapshot)
+class UserSnapshot(ShowUser):
+    class Config:
+        allow_mutation = False
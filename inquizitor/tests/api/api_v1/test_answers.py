@@ -5,11 +5,15 @@ import time
 from fastapi.encoders import jsonable_encoder
 from httpx import AsyncClient
 from pprint import pformat
+from sqlalchemy import event
 from sqlmodel import Session
 from typing import Dict
 
 from inquizitor import crud
+from inquizitor.core.autosave import answer_buffer
+from inquizitor.core.config import settings
 from inquizitor.tests.factories import AnswerFactory, QuizFactory, UserFactory
+from inquizitor.tests.utils.utils import login
 
 
 @pytest.mark.anyio
@@ -97,6 +101,40 @@ class TestUpdateAnswer:
         assert attempt.recent_question_id == question.id
         assert link
 
+    async def test_update_answer_foreign_choice(
+        self, db: Session, client: AsyncClient
+    ) -> None:
+        user, student_cookies = await login(client, is_student=True)
+        quiz = crud.quiz.get(db, id=1)
+        question, other_question = quiz.questions[:2]
+        # the correct choice of another question, worth its points
+        choice = [c for c in other_question.choices if c.is_correct][0]
+        url = f"/quizzes/{quiz.id}/questions/{question.id}/answer"
+
+        answer_in = AnswerFactory.stub(
+            schema_type="create", student=user, choice=choice, question=question
+        )
+        r = await client.put(url, cookies=student_cookies, json=answer_in)
+        assert r.status_code == 404
+
+        own = question.choices[0]
+        r = await client.put(
+            url,
+            cookies=student_cookies,
+            json={"content": own.content, "student_id": user.id, "choice_id": own.id},
+        )
+        assert r.status_code == 200
+        r = await client.put(
+            url, cookies=student_cookies, json={"choice_id": choice.id}
+        )
+        assert r.status_code == 404
+
+        attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+            db, quiz_id=quiz.id, student_id=user.id
+        )
+        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+        assert [answer.choice_id for answer in answers] == [own.id]
+
 
 @pytest.mark.anyio
 class TestGetScore:
@@ -143,6 +181,228 @@ class TestGetScore:
         assert attempt.is_done
 
 
+@pytest.mark.anyio
+class TestUpdateAnswers:
+    async def test_update_answers_student(
+        self, db: Session, client: AsyncClient
+    ) -> None:
+        user, student_cookies = await login(client, is_student=True)
+
+        score = 0
+        quiz = crud.quiz.get(db, id=1)
+        questions = quiz.questions
+        answers_in = []
+        for question in questions:
+            choice = random.choices(question.choices)[0]
+            answers_in.append({"question_id": question.id, "choice_id": choice.id})
+            if choice.is_correct:
+                score += question.points
+        # choice of another question
+        answers_in.append(
+            {"question_id": questions[0].id, "choice_id": questions[1].choices[0].id}
+        )
+
+        r = await client.put(
+            f"/quizzes/{quiz.id}/answers", cookies=student_cookies, json=answers_in
+        )
+        result = r.json()
+        assert r.status_code == 200
+        assert [item["status"] for item in result] == ["created"] * len(questions) + [
+            "invalid"
+        ]
+
+        # answering again updates the same answers
+        r = await client.put(
+            f"/quizzes/{quiz.id}/answers", cookies=student_cookies, json=answers_in[:1]
+        )
+        assert r.status_code == 200
+        assert r.json()[0]["status"] == "updated"
+        assert r.json()[0]["answer_id"] == result[0]["answer_id"]
+
+        r = await client.get(f"/quizzes/{quiz.id}/finish", cookies=student_cookies)
+        assert r.status_code == 200
+        assert r.json() == score
+
+        attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+            db, quiz_id=quiz.id, student_id=user.id
+        )
+        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+        assert len(answers) == len(questions)
+        assert attempt.recent_question_id == questions[0].id
+
+    async def test_update_answers_teacher(
+        self, client: AsyncClient, teacher_cookies: Dict[str, str]
+    ) -> None:
+        r = await client.put(
+            "/quizzes/1/answers", cookies=await teacher_cookies, json=[]
+        )
+        assert r.status_code == 400
+
+
+@pytest.mark.anyio
+class TestIdempotentAnswers:
+    async def test_update_answer_idempotency_key(
+        self, db: Session, client: AsyncClient, monkeypatch
+    ) -> None:
+        user, student_cookies = await login(client, is_student=True)
+
+        quiz = crud.quiz.get(db, id=1)
+        question = quiz.questions[0]
+        first, second = question.choices[:2]
+        url = f"/quizzes/{quiz.id}/questions/{question.id}/answer"
+        answer_in = AnswerFactory.stub(
+            schema_type="create", student=user, choice=first, question=question
+        )
+        headers = {"Idempotency-Key": "retry-1"}
+
+        r = await client.put(
+            url, cookies=student_cookies, json=answer_in, headers=headers
+        )
+        assert r.status_code == 200
+        assert "idempotent-replayed" not in r.headers
+        saved = r.json()
+
+        upserts = []
+        monkeypatch.setattr(
+            crud.quiz_answer, "upsert", lambda *args, **kwargs: upserts.append(1)
+        )
+        r = await client.put(
+            url, cookies=student_cookies, json=answer_in, headers=headers
+        )
+        assert r.status_code == 200
+        assert r.headers["idempotent-replayed"] == "true"
+        assert r.json() == saved
+        assert upserts == []
+
+        # the same key can't be reused for another answer
+        other_in = AnswerFactory.stub(
+            schema_type="create", student=user, choice=second, question=question
+        )
+        r = await client.put(
+            url, cookies=student_cookies, json=other_in, headers=headers
+        )
+        assert r.status_code == 422
+
+        attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+            db, quiz_id=quiz.id, student_id=user.id
+        )
+        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+        assert [answer.choice_id for answer in answers] == [first.id]
+
+
+@pytest.mark.anyio
+class TestAutosaveAnswers:
+    async def test_autosave_answers_student(
+        self, db: Session, client: AsyncClient, monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, "ANSWER_AUTOSAVE", True)
+        user, student_cookies = await login(client, is_student=True)
+
+        score = 0
+        quiz = crud.quiz.get(db, id=1)
+        for question in quiz.questions:
+            for choice in random.choices(question.choices, k=2):
+                answer_in = AnswerFactory.stub(
+                    schema_type="create",
+                    content=choice.content,
+                    student=user,
+                    choice=choice,
+                    question=question,
+                )
+                r = await client.put(
+                    f"/quizzes/{quiz.id}/questions/{question.id}/answer",
+                    cookies=student_cookies,
+                    json=answer_in,
+                )
+                assert r.status_code == 200
+                assert r.json()["choice_id"] == choice.id
+            if choice.is_correct:
+                score += question.points
+
+        attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+            db, quiz_id=quiz.id, student_id=user.id
+        )
+        assert len(answer_buffer) == len(quiz.questions)
+        assert not crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+
+        r = await client.get(f"/quizzes/{quiz.id}/finish", cookies=student_cookies)
+        assert r.status_code == 200
+        assert r.json() == score
+        assert len(answer_buffer) == 0
+        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+        assert len(answers) == len(quiz.questions)
+
+    async def test_autosave_then_direct_write(
+        self, db: Session, client: AsyncClient, monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, "ANSWER_AUTOSAVE", True)
+        user, student_cookies = await login(client, is_student=True)
+
+        quiz = crud.quiz.get(db, id=1)
+        question = quiz.questions[0]
+        older, newer = question.choices[:2]
+        r = await client.put(
+            f"/quizzes/{quiz.id}/questions/{question.id}/answer",
+            cookies=student_cookies,
+            json={"content": older.content, "choice_id": older.id},
+        )
+        assert r.status_code == 200
+        # the bulk endpoint writes directly, the buffered click goes first
+        r = await client.put(
+            f"/quizzes/{quiz.id}/answers",
+            cookies=student_cookies,
+            json=[{"question_id": question.id, "choice_id": newer.id}],
+        )
+        assert r.status_code == 200
+        assert len(answer_buffer) == 0
+
+        r = await client.get(f"/quizzes/{quiz.id}/finish", cookies=student_cookies)
+        assert r.status_code == 200
+        attempt = crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+            db, quiz_id=quiz.id, student_id=user.id
+        )
+        answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+        assert [answer.choice_id for answer in answers] == [newer.id]
+
+    async def test_autosave_answer_reads_open_attempt(
+        self, db: Session, client: AsyncClient, monkeypatch
+    ) -> None:
+        monkeypatch.setattr(settings, "ANSWER_AUTOSAVE", True)
+        user, student_cookies = await login(client, is_student=True)
+
+        quiz = crud.quiz.get(db, id=1)
+        question = quiz.questions[0]
+        url = f"/quizzes/{quiz.id}/questions/{question.id}/answer"
+        choice = question.choices[0]
+        body = {"content": choice.content, "choice_id": choice.id}
+        # the first click opens the attempt
+        r = await client.put(url, cookies=student_cookies, json=body)
+        assert r.status_code == 200
+        attempt_id = r.json()["attempt_id"]
+
+        writes = []
+        engine = db.get_bind()
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if not statement.lstrip().upper().startswith("SELECT"):
+                writes.append(statement)
+
+        def commit(conn):
+            writes.append("COMMIT")
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "commit", commit)
+        try:
+            r = await client.put(url, cookies=student_cookies, json=body)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(engine, "commit", commit)
+        assert r.status_code == 200
+        assert r.json()["attempt_id"] == attempt_id
+        assert writes == []
+        answer_buffer.flush(db)
+
+
 # NOTE needs to vary datetimes for automated testing to work
 # with STARTED_AT ordering instead of ATTEMPT ID
 # see crud/crud_quiz/attempt.py: get_latest_by_quiz_and_student_ids
@@ -9,7 +9,14 @@ from httpx import AsyncClient
 from pprint import pformat
 from typing import Dict
 
-from inquizitor.core.config import settings
+from sqlmodel import Session
+
+from inquizitor import create_app
+from inquizitor.api.deps import get_db
+from inquizitor.core import security
+from inquizitor.core.config import Settings, settings
+from inquizitor.core.denylist import TokenDenylist
+from inquizitor.crud import crud_token
 
 logging.basicConfig(level=logging.INFO)
 
@@ -66,3 +73,44 @@ async def test_access_revoke(
     r = await client.get("/users/profile", cookies=cookies)
     result = r.json()
     assert r.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_access_revoke_other_worker(
+    db: Session, client: AsyncClient, superuser_cookies: Dict[str, str], monkeypatch
+) -> None:
+    cookies = await superuser_cookies
+    other_app = create_app(db)
+    other_app.dependency_overrides[get_db] = lambda: db
+    # the other worker runs in its own process, with its own denylist
+    monkeypatch.setattr(crud_token, "denylist", TokenDenylist())
+    async with AsyncClient(app=other_app, base_url="http://test") as other:
+        r = await other.delete("/login/access-revoke", cookies=cookies)
+        assert r.status_code == 200
+    monkeypatch.undo()
+
+    r = await client.get("/users/profile", cookies=cookies)
+    assert r.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_get_tokens_hasher_busy(client: AsyncClient, monkeypatch) -> None:
+    busy_hasher = security.PasswordHasher(max_workers=1, max_queue=0)
+    busy_hasher._slots.acquire()
+    monkeypatch.setattr(security, "hasher", busy_hasher)
+
+    r = await client.post("/login/token", data=LOGIN_DATA)
+    assert r.status_code == 503
+    assert "Retry-After" in r.headers
+
+
+def test_hasher_leaves_threads_for_requests() -> None:
+    Settings(
+        THREADPOOL_MAX_WORKERS=20, PASSWORD_HASH_WORKERS=4, PASSWORD_HASH_QUEUE_SIZE=6
+    )
+    with pytest.raises(ValueError):
+        Settings(
+            THREADPOOL_MAX_WORKERS=20,
+            PASSWORD_HASH_WORKERS=4,
+            PASSWORD_HASH_QUEUE_SIZE=7,
+        )
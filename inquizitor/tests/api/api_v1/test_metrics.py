@@ -0,0 +1,138 @@
+import re
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session
+from typing import Dict
+
+from inquizitor import create_app
+from inquizitor.core.config import settings
+from inquizitor.core.metrics import (
+    CallbackMetric,
+    Histogram,
+    Metric,
+    Registry,
+    get_route_template,
+)
+
+TOKEN = {"Authorization": "Bearer scraper"}
+
+
+@pytest.fixture(scope="module")
+def app(db: Session):
+    """App with the metrics, scraped with a token"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper")
+        yield create_app(db)
+
+
+def get_sample(text: str, sample: str, default: float = None) -> float:
+    """Value of the sample (name and labels exactly as rendered)"""
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    if not match:
+        assert default is not None, sample
+        return default
+    return float(match.group(1))
+
+
+@pytest.mark.anyio
+class TestMetrics:
+    async def test_metrics(
+        self, client: AsyncClient, teacher_cookies: Dict[str, str]
+    ) -> None:
+        teacher_cookies = await teacher_cookies
+        r = await client.get("/metrics")
+        assert r.status_code == 401
+        r = await client.get("/metrics", headers={"Authorization": "Bearer other"})
+        assert r.status_code == 401
+        r = await client.get("/metrics", headers=TOKEN)
+        assert r.status_code == 200
+        before = r.text
+
+        r = await client.get("/quizzes/1/results", cookies=teacher_cookies)
+        assert r.status_code == 200
+        r = await client.get("/quizzes/1/results")
+        assert r.status_code == 401
+        r = await client.get("/no/such/path")
+        assert r.status_code == 404
+        r = await client.delete("/quizzes/1/results", cookies=teacher_cookies)
+        assert r.status_code == 405
+
+        r = await client.get("/metrics", headers=TOKEN)
+        assert r.headers["content-type"].startswith("text/plain")
+        text = r.text
+        route = 'method="GET",route="/quizzes/{quiz_index}/results"'
+        for status in ("200", "401"):
+            sample = f'http_requests_total{{{route},status="{status}"}}'
+            assert get_sample(text, sample) == get_sample(before, sample, 0) + 1
+        assert get_sample(
+            text, 'http_requests_total{method="GET",route="unmatched",status="404"}'
+        )
+        assert get_sample(
+            text,
+            'http_requests_total{method="DELETE",'
+            'route="/quizzes/{quiz_index}/results",status="405"}',
+        )
+        assert get_sample(
+            text, f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'
+        ) == get_sample(text, f"http_request_duration_seconds_count{{{route}}}")
+        # the scrape itself is in flight
+        assert get_sample(text, "http_requests_in_flight") == 1
+        assert get_sample(text, 'token_denylist_lookups_total{result="miss"}') > 0
+        assert get_sample(text, "password_hash_queued") == 0
+
+
+def test_route_template() -> None:
+    def endpoint():
+        pass
+
+    # one endpoint serving two routes
+    app = FastAPI()
+    app.get("/quizzes/{quiz_id}")(endpoint)
+    app.get("/users/{user_id}")(endpoint)
+
+    def scope(method: str, path: str):
+        return {"type": "http", "app": app, "method": method, "path": path}
+
+    assert get_route_template(scope("GET", "/users/1")) == "/users/{user_id}"
+    assert get_route_template(scope("POST", "/quizzes/1")) == "/quizzes/{quiz_id}"
+    assert get_route_template(scope("GET", "/no/such/path")) is None
+
+
+def test_metric_needs_samples() -> None:
+    class Untyped(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Untyped("untyped", "No samples")
+
+
+def test_histogram() -> None:
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency", ["route"], buckets=[0.1, 1])
+    )
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value, route="/")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert get_sample(text, 'latency_seconds_bucket{route="/",le="0.1"}') == 2
+    assert get_sample(text, 'latency_seconds_bucket{route="/",le="1"}') == 3
+    assert get_sample(text, 'latency_seconds_bucket{route="/",le="+Inf"}') == 4
+    assert get_sample(text, 'latency_seconds_sum{route="/"}') == 2.65
+    assert get_sample(text, 'latency_seconds_count{route="/"}') == 4
+
+
+def test_pool_metrics() -> None:
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2)
+    registry = Registry()
+    registry.register(
+        CallbackMetric("db_pool_checked_out", "In use", engine.pool.checkedout)
+    )
+    with engine.connect():
+        assert get_sample(registry.render(), "db_pool_checked_out") == 1
+    assert get_sample(registry.render(), "db_pool_checked_out") == 0
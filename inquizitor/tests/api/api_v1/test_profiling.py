@@ -0,0 +1,116 @@
+import anyio
+import threading
+import time
+import pytest
+from httpx import AsyncClient
+from sqlmodel import Session
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+from typing import Dict
+
+from inquizitor import create_app
+from inquizitor.api import deps
+from inquizitor.core.config import settings
+from inquizitor.core.profiling import ProfilingMiddleware, StackSampler
+
+
+@pytest.fixture(scope="module")
+def app(db: Session):
+    """App with profiling enabled"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+        yield create_app(db)
+
+
+@pytest.mark.anyio
+class TestProfiling:
+    async def test_profile_request(
+        self, client: AsyncClient, superuser_cookies: Dict[str, str]
+    ) -> None:
+        superuser_cookies = await superuser_cookies
+        r = await client.get(
+            "/quizzes/", cookies=superuser_cookies, headers={"X-Profile": "1"}
+        )
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        assert r.headers["x-profiled-status"] == "200"
+        assert r.text.startswith("GET /quizzes/ -> 200: ")
+        assert "cum (s)" in r.text
+
+        r = await client.get(
+            "/quizzes/1000000", params={"profile": "1"}, cookies=superuser_cookies
+        )
+        assert r.headers["x-profiled-status"] == "404"
+
+    async def test_profile_request_not_superuser(
+        self, client: AsyncClient, teacher_cookies: Dict[str, str]
+    ) -> None:
+        teacher_cookies = await teacher_cookies
+        for cookies in (teacher_cookies, None):
+            r = await client.get(
+                "/quizzes/", cookies=cookies, headers={"X-Profile": "1"}
+            )
+            assert "x-profiled-status" not in r.headers
+            assert r.headers["content-type"] == "application/json"
+
+    async def test_profile_request_without_token(
+        self, client: AsyncClient, monkeypatch
+    ) -> None:
+        def get_current_user(*args):
+            raise AssertionError("looked up a user without a token")
+
+        monkeypatch.setattr(deps, "get_current_user", get_current_user)
+        r = await client.get("/quizzes/", headers={"X-Profile": "1"})
+        assert r.status_code == 401
+        assert "x-profiled-status" not in r.headers
+
+    async def test_profile_one_request_at_a_time(self) -> None:
+        started, release = anyio.Event(), anyio.Event()
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            started.set()
+            await release.wait()
+            await PlainTextResponse("done")(scope, receive, send)
+
+        async def authorize(request: Request) -> bool:
+            return True
+
+        middleware = ProfilingMiddleware(app, authorize=authorize)
+        async with AsyncClient(app=middleware, base_url="http://test") as client:
+            responses = []
+
+            async def profile() -> None:
+                responses.append(await client.get("/", headers={"X-Profile": "1"}))
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(profile)
+                await started.wait()
+                r = await client.get("/", headers={"X-Profile": "1"})
+                assert r.status_code == 429
+                release.set()
+
+            assert responses[0].headers["x-profiled-status"] == "200"
+            r = await client.get("/", headers={"X-Profile": "1"})
+            assert r.headers["x-profiled-status"] == "200"
+
+
+def busy(until: float) -> None:
+    while time.perf_counter() < until:
+        pass
+
+
+def test_stack_sampler() -> None:
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    thread = threading.Thread(target=busy, args=(time.perf_counter() + 0.1,))
+    thread.start()
+    thread.join()
+    sampler.stop()
+
+    assert sampler.samples > 0
+    # the main thread waiting in join is sampled too
+    ((filename, lineno, name), count) = sampler.own.most_common(1)[0]
+    assert (filename, name) == (__file__, "busy")
+    assert count == sampler.cumulative[filename, lineno, name]
+    assert "busy (inquizitor/tests/api/api_v1/test_profiling.py:" in sampler.report(50)
@@ -0,0 +1,117 @@
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient
+from sqlmodel import Session
+
+from inquizitor import crud
+from inquizitor.core.querystats import fingerprint, track_queries
+from inquizitor.tests.factories import ChoiceFactory, QuestionFactory, QuizFactory
+from inquizitor.tests.utils.utils import get_query_count, login
+
+# most statements one request may run, whatever the number of quizzes,
+# questions or participants (raise one only with a good reason)
+TEACHER_BUDGETS = {
+    ("GET", "/quizzes/"): 2,
+    ("POST", "/quizzes/"): 5,
+    ("GET", "/quizzes/{quiz_id}"): 1,
+    ("GET", "/quizzes/{quiz_id}/questions/{question_id}"): 2,
+    ("GET", "/quizzes/{quiz_id}/results"): 5,
+}
+STUDENT_BUDGETS = {
+    ("GET", "/quizzes/"): 2,
+    ("GET", "/quizzes/{quiz_id}"): 6,
+    # includes locking the attempt row before adjusting its score
+    ("PUT", "/quizzes/{quiz_id}/questions/{question_id}/answer"): 12,
+    ("PUT", "/quizzes/{quiz_id}/answers"): 9,
+}
+
+
+async def assert_within_budget(
+    db: Session, client: AsyncClient, cookies, budgets, json=None, **ids
+) -> None:
+    for (method, url), budget in budgets.items():
+        url = url.format(**ids)
+        body = json.get((method, url)) if json else None
+        # warm up the user cache, then measure with nothing in the session
+        r = await client.request(method, url, cookies=cookies, json=body)
+        assert r.status_code == 200, (method, url, r.json())
+        db.expunge_all()
+        r = await client.request(method, url, cookies=cookies, json=body)
+        assert r.status_code == 200, (method, url, r.json())
+        assert get_query_count(r) <= budget, (method, url, get_query_count(r))
+
+
+@pytest.mark.anyio
+class TestQueryBudgets:
+    async def test_query_budgets(self, db: Session, client: AsyncClient) -> None:
+        teacher, teacher_cookies = await login(client, is_teacher=True)
+        for i in range(3):
+            quiz = QuizFactory(teacher=teacher)
+            questions = []
+            for j in range(4):
+                question = QuestionFactory(quiz=quiz)
+                for k in range(3):
+                    ChoiceFactory(question=question, is_correct=k == 0)
+                questions.append(question)
+        quiz_id, question_id = quiz.id, question.id
+        quiz_in = QuizFactory.stub(schema_type="create", teacher=teacher)
+        answers = [
+            {"question_id": question.id, "choice_id": question.choices[0].id}
+            for question in questions
+        ]
+
+        for i in range(3):
+            student, student_cookies = await login(client, is_student=True)
+            await assert_within_budget(
+                db,
+                client,
+                student_cookies,
+                STUDENT_BUDGETS,
+                json={
+                    ("PUT", f"/quizzes/{quiz_id}/answers"): answers,
+                    (
+                        "PUT",
+                        f"/quizzes/{quiz_id}/questions/{question_id}/answer",
+                    ): {
+                        "content": "answer",
+                        "student_id": student.id,
+                        "choice_id": answers[-1]["choice_id"],
+                        "question_id": question_id,
+                    },
+                },
+                quiz_id=quiz_id,
+                question_id=question_id,
+            )
+
+        await assert_within_budget(
+            db,
+            client,
+            teacher_cookies,
+            TEACHER_BUDGETS,
+            json={("POST", "/quizzes/"): jsonable_encoder(quiz_in)},
+            quiz_id=quiz_id,
+            question_id=question_id,
+        )
+
+    async def test_server_timing(self, client: AsyncClient) -> None:
+        r = await client.get("/quizzes/")
+        assert r.status_code == 401
+        assert r.headers["server-timing"].startswith("db;dur=")
+        assert get_query_count(r) == 0
+
+
+def test_repeated_statements(db: Session) -> None:
+    with track_queries() as stats:
+        for id in range(1, 7):
+            crud.user.get(db, id=id)
+            db.expunge_all()
+        crud.quiz.get_multi(db)
+
+    assert stats.count == 7
+    assert stats.duration > 0
+    ((shape, count),) = stats.repeated(5)
+    assert count == 6
+    assert shape.startswith("SELECT user.")
+    assert fingerprint("SELECT 1 WHERE id IN (?, ?,\n ?)") == (
+        "SELECT ? WHERE id IN (?)"
+    )
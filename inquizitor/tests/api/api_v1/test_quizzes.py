@@ -11,6 +11,7 @@ from fastapi.encoders import jsonable_encoder
 from inquizitor import crud
 from inquizitor.models import QuizStudentLinkCreate
 from inquizitor.tests.factories import *
+from inquizitor.tests.utils.utils import capture_selects, login
 
 logging.basicConfig(level=logging.INFO)
 
@@ -344,3 +345,39 @@ class TestDeleteQuiz:
         r = await client.delete(f"/quizzes/{quiz.id}", cookies=await student_cookies)
         result = r.json()
         assert r.status_code == 400
+
+
+@pytest.mark.anyio
+class TestQueryCounts:
+    """Responses with questions (or choices) must not lazy-load them per row"""
+
+    async def test_query_counts_teacher(self, db: Session, client: AsyncClient) -> None:
+        teacher, teacher_cookies = await login(client, is_teacher=True)
+        quizzes = []
+        for i in range(3):
+            quiz = QuizFactory(teacher=teacher)
+            for j in range(3):
+                question = QuestionFactory(quiz=quiz)
+                for k in range(3):
+                    ChoiceFactory(question=question)
+            quizzes.append((quiz.id, question.id))
+        quiz_id, question_id = quizzes[0]
+        quiz_in = QuizFactory.stub(schema_type="create", teacher=teacher)
+
+        for method, url, json, expected in [
+            ("GET", "/quizzes/", None, 2),
+            ("GET", f"/quizzes/{quiz_id}", None, 1),
+            ("GET", f"/quizzes/{quiz_id}/questions/{question_id}", None, 2),
+            # two quiz_code checks, the refresh after the insert and the reload
+            ("POST", "/quizzes/", jsonable_encoder(quiz_in), 4),
+        ]:
+            # the first request also caches the user
+            r = await client.request(method, url, cookies=teacher_cookies, json=json)
+            assert r.status_code == 200
+            db.expunge_all()
+            with capture_selects(db) as statements:
+                r = await client.request(
+                    method, url, cookies=teacher_cookies, json=json
+                )
+            assert r.status_code == 200
+            assert len(statements) == expected, (method, url, statements)
@@ -11,6 +11,7 @@ from sqlmodel.pool import StaticPool
 from inquizitor import create_app, crud, models, utils
 from inquizitor.tests import common
 from inquizitor.api.deps import get_db
+from inquizitor.core.security import set_bcrypt_rounds
 from inquizitor.db.init_db import init_db, drop_db
 from inquizitor.db.session import TestSession, test_engine
 from inquizitor.tests import common
@@ -20,6 +21,9 @@ from inquizitor.tests.utils.utils import (
     get_teacher_cookies,
 )
 
+# the cheapest bcrypt cost, hashing dominates the test run otherwise
+set_bcrypt_rounds(4)
+
 
 @pytest.fixture(scope="session")
 def db() -> Generator:
@@ -0,0 +1,92 @@
+import logging
+import pytest
+from httpx import AsyncClient
+from logging.handlers import BufferingHandler
+from sqlalchemy import event
+from sqlmodel import Session
+from typing import Dict, Iterator, List
+
+from inquizitor import crud
+from inquizitor.core.querystats import track_queries
+from inquizitor.core.slowqueries import SlowQueryLog, redact
+
+
+@pytest.fixture
+def records(db: Session) -> Iterator[List[logging.LogRecord]]:
+    """Records of a slow query log where every statement is slow"""
+    logger = logging.getLogger("test_slow_query_log")
+    logger.propagate = False
+    handler = BufferingHandler(capacity=100)
+    logger.addHandler(handler)
+    log = SlowQueryLog(
+        threshold=1e-9,
+        explain=True,
+        log_parameters=True,
+        max_params_length=20,
+        logger=logger,
+    )
+    engine = db.get_bind()
+    log.instrument(engine)
+    try:
+        yield handler.buffer
+    finally:
+        event.remove(engine, "before_cursor_execute", log._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", log._after_cursor_execute)
+        logger.removeHandler(handler)
+
+
+def test_slow_query_log(db: Session, records: List[logging.LogRecord]) -> None:
+    with track_queries("GET /quizzes/"):
+        crud.quiz.get_multi_by_author(db, teacher_id=1, limit=1)
+    crud.user.get_by_username(db, username="x" * 100)
+
+    quiz, user = [record.getMessage() for record in records]
+    lines = quiz.splitlines()
+    assert "ms GET /quizzes/ inquizitor/crud/crud_quiz/quiz.py:" in lines[0]
+    assert lines[0].endswith(" get_multi_by_author")
+    assert lines[1].startswith("  SELECT quiz.")
+    assert lines[1].endswith("WHERE quiz.teacher_id = ? LIMIT ? OFFSET ?")
+    assert lines[2] == "  parameters: (1, 1, 0)"
+    assert lines[3] == "  plan:"
+    assert "quiz" in lines[4]
+
+    lines = user.splitlines()
+    assert " - inquizitor/crud/crud_user.py:" in lines[0]
+    assert lines[2] == "  parameters: ('xxxxxxxxxxxxxxx..."
+
+
+def test_slow_query_log_redacts(db: Session, records: List[logging.LogRecord]) -> None:
+    crud.user.get_by_email(db, email="someone@example.com")
+
+    lines = records[0].getMessage().splitlines()
+    assert lines[2] == "  parameters: ('***', 1, 0)"
+    assert redact({"jti_1": "abc", "id_1": 1}) == {"jti_1": "***", "id_1": 1}
+    # without the names of positional parameters nothing is shown
+    assert redact((1, "abc")) == ("***", "***")
+
+
+def test_slow_query_log_parameters_off(db: Session) -> None:
+    logger = logging.getLogger("test_slow_query_log_parameters_off")
+    logger.propagate = False
+    handler = BufferingHandler(capacity=100)
+    logger.addHandler(handler)
+    log = SlowQueryLog(threshold=1e-9, logger=logger)
+    log.record(db.connection(), "SELECT ?", ("secret",), 1, False)
+
+    assert "secret" not in handler.buffer[0].getMessage()
+    assert "parameters:" not in handler.buffer[0].getMessage()
+
+
+@pytest.mark.anyio
+async def test_slow_query_log_route(
+    client: AsyncClient,
+    teacher_cookies: Dict[str, str],
+    records: List[logging.LogRecord],
+) -> None:
+    teacher_cookies = await teacher_cookies
+    r = await client.get("/quizzes/1", cookies=teacher_cookies)
+    assert r.status_code == 200
+
+    routes = {tuple(record.getMessage().split()[1:3]) for record in records}
+    assert ("GET", "/quizzes/{quiz_index}") in routes
+    assert ("GET", "/quizzes/1") not in routes
@@ -0,0 +1,187 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from inquizitor import crud, models
+from inquizitor.core.autosave import AnswerBuffer, AnswerBufferFull
+from inquizitor.tests.factories import AttemptFactory, UserFactory
+from inquizitor.tests.utils.utils import answer_quiz, create_quiz
+
+
+def test_get_all_by_attempt(db: Session) -> None:
+    quiz, questions = create_quiz()
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(
+        quiz=quiz, student=student, recent_question=None, is_done=True
+    )
+    other_attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    answer_quiz(quiz, attempt, student, questions)
+    answer_quiz(quiz, other_attempt, student, questions)
+
+    answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+    assert len(answers) == len(questions)
+    assert {answer.attempt_id for answer in answers} == {attempt.id}
+    assert [answer.question_id for answer in answers] == [
+        question.id for question in questions
+    ]
+
+
+def test_get_multi_by_attempt_ids(db: Session) -> None:
+    quiz, questions = create_quiz()
+    attempts = []
+    for i in range(3):
+        student = UserFactory(is_student=True)
+        attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+        answer_quiz(quiz, attempt, student, questions[: i + 1])
+        attempts.append(attempt)
+    unanswered = AttemptFactory(quiz=quiz, recent_question=None)
+    attempt_ids = [attempt.id for attempt in attempts] + [unanswered.id]
+
+    answers = crud.quiz_answer.get_multi_by_attempt_ids(db, attempt_ids=attempt_ids)
+
+    assert list(answers) == attempt_ids
+    for i, attempt in enumerate(attempts):
+        assert [answer.question_id for answer in answers[attempt.id]] == [
+            question.id for question in questions[: i + 1]
+        ]
+    assert answers[unanswered.id] == []
+
+
+def test_running_score(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=2)
+    student = UserFactory(is_student=True)
+    attempt_in = models.QuizAttemptCreate(student_id=student.id, quiz_id=quiz.id)
+    attempt = crud.quiz_attempt.create(db, obj_in=attempt_in)
+    assert attempt.score == 0
+
+    question = questions[0]
+    correct = [choice for choice in question.choices if choice.is_correct][0]
+    wrong = [choice for choice in question.choices if not choice.is_correct][0]
+    answer_in = models.QuizAnswerCreate(
+        content=correct.content,
+        student_id=student.id,
+        choice_id=correct.id,
+        attempt_id=attempt.id,
+        question_id=question.id,
+    )
+    answer = crud.quiz_answer.create(db, obj_in=answer_in)
+    db.refresh(attempt)
+    assert answer.is_correct
+    assert attempt.score == question.points
+
+    answer_in = models.QuizAnswerUpdate(content=wrong.content, choice_id=wrong.id)
+    answer = crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
+    db.refresh(attempt)
+    assert not answer.is_correct
+    assert attempt.score == 0
+
+    answer_in = models.QuizAnswerUpdate(content=correct.content, choice_id=correct.id)
+    answer = crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
+    attempt = crud.quiz_attempt.finish(db, db_obj=attempt)
+    assert attempt.score == question.points
+    assert crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id) == []
+
+
+def test_running_score_after_regrade(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=1)
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None, score=0)
+    question = questions[0]
+    correct = [choice for choice in question.choices if choice.is_correct][0]
+    wrong = [choice for choice in question.choices if not choice.is_correct][0]
+    answer_in = models.QuizAnswerCreate(
+        content=correct.content,
+        student_id=student.id,
+        choice_id=correct.id,
+        attempt_id=attempt.id,
+        question_id=question.id,
+    )
+    answer = crud.quiz_answer.create(db, obj_in=answer_in)
+    assert answer.points == question.points
+
+    # the teacher swaps the correct choice, the answer keeps what it was awarded
+    correct.is_correct, wrong.is_correct = False, True
+    db.commit()
+    answer_in = models.QuizAnswerUpdate(content=wrong.content, choice_id=wrong.id)
+    answer = crud.quiz_answer.update(db, db_obj=answer, obj_in=answer_in)
+    db.refresh(attempt)
+    assert answer.points == question.points
+    assert attempt.score == question.points
+    assert crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id) == []
+
+
+def test_upsert(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=1)
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None, score=0)
+    question = questions[0]
+    correct = [choice for choice in question.choices if choice.is_correct][0]
+    wrong = [choice for choice in question.choices if not choice.is_correct][0]
+
+    answers = []
+    for choice in (correct, correct, wrong):
+        answer_in = models.QuizAnswerCreate(
+            content=choice.content,
+            student_id=student.id,
+            choice_id=choice.id,
+            attempt_id=attempt.id,
+            question_id=question.id,
+        )
+        answers.append(crud.quiz_answer.upsert(db, obj_in=answer_in))
+        db.refresh(attempt)
+        assert attempt.score == (question.points if choice.is_correct else 0)
+
+    assert len({answer.id for answer in answers}) == 1
+    assert answers[-1].choice_id == wrong.id and not answers[-1].is_correct
+    assert len(crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)) == 1
+    assert crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id) == []
+
+    # the database itself refuses a second answer to the question
+    db.add(models.QuizAnswer(**answer_in.dict()))
+    with pytest.raises(IntegrityError):
+        db.flush()
+    db.rollback()
+
+
+def test_get_multi_score_drift(db: Session) -> None:
+    quiz, questions = create_quiz()
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    score = answer_quiz(quiz, attempt, student, questions)
+    db.refresh(attempt)
+    attempt = crud.quiz_attempt.update(db, db_obj=attempt, obj_in={"score": score + 1})
+
+    drift = crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id)
+    assert drift == [(attempt.id, score + 1, score)]
+
+    assert crud.quiz_attempt.regrade(db, ids=[attempt.id]) == 1
+    assert crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id) == []
+
+
+def test_answer_buffer(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=2)
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None, score=0)
+    question = questions[0]
+    correct = [choice for choice in question.choices if choice.is_correct][0]
+    wrong = [choice for choice in question.choices if not choice.is_correct][0]
+    buffer = AnswerBuffer(max_size=1, interval_ms=10, put_timeout=0)
+
+    # clicks on the same question coalesce, the last one wins
+    buffer.put(attempt=attempt, question_id=question.id, choice_id=wrong.id)
+    buffer.put(attempt=attempt, question_id=question.id, choice_id=correct.id)
+    assert len(buffer) == 1
+    with pytest.raises(AnswerBufferFull):
+        buffer.put(
+            attempt=attempt,
+            question_id=questions[1].id,
+            choice_id=questions[1].choices[0].id,
+        )
+
+    assert buffer.flush(db, student_id=student.id + 1) == 0
+    assert buffer.flush(db, student_id=student.id) == 1
+    assert len(buffer) == 0
+    answers = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+    assert [answer.choice_id for answer in answers] == [correct.id]
+    db.refresh(attempt)
+    assert attempt.score == question.points
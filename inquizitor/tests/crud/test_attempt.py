@@ -0,0 +1,144 @@
+from sqlmodel import Session
+
+from inquizitor import crud
+from inquizitor.tests.factories import AnswerFactory, AttemptFactory, UserFactory
+from inquizitor.tests.utils.utils import answer_quiz, create_quiz
+
+
+def test_get_score(db: Session) -> None:
+    quiz, questions = create_quiz()
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    score = answer_quiz(quiz, attempt, student, questions)
+
+    assert crud.quiz_attempt.get_score(db, id=attempt.id) == score
+    # reading the score does not grade the answers
+    for answer in crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id):
+        assert answer.is_correct is False
+
+
+def test_get_score_no_answers(db: Session) -> None:
+    quiz, questions = create_quiz()
+    attempt = AttemptFactory(quiz=quiz, recent_question=None)
+
+    assert crud.quiz_attempt.get_score(db, id=attempt.id) == 0
+
+
+def test_get_multi_scores(db: Session) -> None:
+    quiz, questions = create_quiz()
+    expected = {}
+    for i in range(3):
+        student = UserFactory(is_student=True)
+        attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+        expected[attempt.id] = answer_quiz(quiz, attempt, student, questions)
+
+    assert crud.quiz_attempt.get_multi_scores(db, ids=list(expected)) == expected
+
+
+def test_finish(db: Session) -> None:
+    quiz, questions = create_quiz()
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    score = answer_quiz(quiz, attempt, student, questions)
+
+    attempt = crud.quiz_attempt.finish(db, db_obj=attempt)
+
+    assert attempt.is_done
+    assert attempt.score == score
+    assert crud.quiz_attempt.get_score(db, id=attempt.id) == score
+    for answer in crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id):
+        choice = crud.quiz_choice.get(db, id=answer.choice_id)
+        assert answer.is_correct == choice.is_correct
+
+
+def test_regrade(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=1)
+    question = questions[0]
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    wrong_choice = [choice for choice in question.choices if not choice.is_correct][0]
+    AnswerFactory(
+        choice=wrong_choice, student=student, attempt=attempt, question=question
+    )
+    attempt = crud.quiz_attempt.finish(db, db_obj=attempt)
+    assert attempt.score == 0
+
+    db.refresh(wrong_choice)
+    crud.quiz_choice.update(db, db_obj=wrong_choice, obj_in={"is_correct": True})
+    assert crud.quiz_attempt.regrade(db, quiz_id=quiz.id) == 1
+
+    db.refresh(attempt)
+    assert attempt.score == question.points
+    answer = crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)[0]
+    assert answer.is_correct
+
+
+def test_get_multi_latest(db: Session) -> None:
+    quiz_1, questions = create_quiz(number_of_questions=1)
+    quiz_2, questions = create_quiz(number_of_questions=1)
+    student_1 = UserFactory(is_student=True)
+    student_2 = UserFactory(is_student=True)
+    latest = {}
+    for quiz in [quiz_1, quiz_2]:
+        for student in [student_1, student_2]:
+            for i in range(3):
+                attempt = AttemptFactory(
+                    quiz=quiz, student=student, recent_question=None, is_done=i < 2
+                )
+            latest[(quiz.id, student.id)] = attempt.id
+
+    attempts = crud.quiz_attempt.get_multi_latest_by_quiz_id(db, id=quiz_1.id)
+    assert [attempt.id for attempt in attempts] == [
+        latest[(quiz_1.id, student_2.id)],
+        latest[(quiz_1.id, student_1.id)],
+    ]
+
+    attempts = crud.quiz_attempt.get_multi_latest_by_student_id(
+        db, student_id=student_1.id
+    )
+    assert [attempt.id for attempt in attempts] == [
+        latest[(quiz_2.id, student_1.id)],
+        latest[(quiz_1.id, student_1.id)],
+    ]
+
+    attempts = crud.quiz_attempt.get_multi_latest(
+        db, quiz_id=quiz_2.id, student_id=student_2.id
+    )
+    assert [attempt.id for attempt in attempts] == [latest[(quiz_2.id, student_2.id)]]
+
+
+def test_ensure_attempt(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=2)
+    student = UserFactory(is_student=True)
+
+    attempt, link = crud.quiz_attempt.ensure_attempt(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+    assert not attempt.is_done
+    assert attempt.score == 0
+    assert (link.quiz_id, link.student_id) == (quiz.id, student.id)
+
+    # a second tab gets the same attempt, which can move to another question
+    again, _ = crud.quiz_attempt.ensure_attempt(
+        db, quiz_id=quiz.id, student_id=student.id, recent_question_id=questions[1].id
+    )
+    assert again.id == attempt.id
+    assert again.recent_question_id == questions[1].id
+    again, _ = crud.quiz_attempt.ensure_attempt(
+        db,
+        quiz_id=quiz.id,
+        student_id=student.id,
+        recent_question_id=questions[0].id,
+        update_recent_question=False,
+    )
+    assert again.recent_question_id == questions[1].id
+
+    crud.quiz_attempt.finish(db, db_obj=attempt)
+    retake, _ = crud.quiz_attempt.ensure_attempt(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+    assert retake.id != attempt.id
+    attempts = crud.quiz_attempt.get_multi_by_quiz_and_student_ids(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+    assert [attempt.id for attempt in attempts] == [retake.id, attempt.id]
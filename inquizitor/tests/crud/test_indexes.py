@@ -0,0 +1,140 @@
+import json
+import os
+import re
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from inquizitor import crud
+from inquizitor.tests.factories import AttemptFactory, UserFactory, use_session
+from inquizitor.tests.utils.utils import answer_quiz, capture_selects, create_quiz
+
+# tables read on every quiz request, none of them should be scanned in full
+HOT_TABLES = {"quiz", "quizattempt", "quizanswer", "quizquestion", "quizchoice"}
+
+
+def full_scans(db: Session, statements) -> list:
+    """Tables the plan of each statement reads without an index"""
+    connection = db.connection()
+    scans = []
+    parsed = 0
+    for statement, parameters in statements:
+        if connection.dialect.name == "sqlite":
+            plan = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).all()
+            for row in plan:
+                # 'SCAN quizattempt' is a full scan, an index scan reads
+                # 'SEARCH ... USING INDEX' or 'SCAN ... USING (COVERING) INDEX',
+                # SQLite before 3.36 writes 'SCAN TABLE quizattempt'
+                parsed += bool(re.match(r"(SCAN|SEARCH) (TABLE )?\w", row[-1]))
+                match = re.fullmatch(r"SCAN (?:TABLE )?(\w+?)(_\d+)?", row[-1])
+                if match and match.group(1) in HOT_TABLES:
+                    scans.append((match.group(1), statement))
+        else:
+            connection.exec_driver_sql("SET enable_seqscan = off")
+            (plan,) = connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            ).one()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(node.get("Plans", []))
+                # with seqscan disabled a Seq Scan means no index could be used
+                if node["Node Type"] == "Seq Scan":
+                    if node["Relation Name"] in HOT_TABLES:
+                        scans.append((node["Relation Name"], statement))
+                parsed += "Relation Name" in node
+    # a plan format this doesn't understand must not pass as "no full scans"
+    assert parsed, "no table access found in the query plans"
+    return scans
+
+
+def call_crud_quiz_methods(db: Session, *, quiz, question, choice, attempt, student):
+    crud.quiz.get_by_code(db, code=quiz.quiz_code or "")
+    crud.quiz.get_multi_by_name(db, name=quiz.name)
+    crud.quiz.get_multi_by_author(db, teacher_id=quiz.teacher_id or 0)
+    crud.quiz.has_question(db, quiz_index=quiz.id, question_id=question.id)
+    crud.quiz.has_question(db, quiz_index="code", question_id=question.id)
+    crud.quiz.get_multi_by_participant(db, student=student)
+    crud.quiz.get_multi_results_by_quiz_id(db, id=quiz.id)
+
+    crud.quiz_question.get_by_quiz(db, id=question.id, quiz_id=quiz.id)
+    crud.quiz_question.has_choice(db, question_id=question.id, choice_id=choice.id)
+    crud.quiz_choice.get_by_question(db, id=choice.id, question_id=question.id)
+    crud.quiz_student_link.get_by_quiz_and_student_ids(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+
+    crud.quiz_attempt.get_latest_by_quiz_and_student_ids(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+    crud.quiz_attempt.get_multi_by_quiz_and_student_ids(
+        db, quiz_id=quiz.id, student_id=student.id
+    )
+    crud.quiz_attempt.get_multi_latest_by_quiz_id(db, id=quiz.id)
+    crud.quiz_attempt.get_multi_latest_by_student_id(db, student_id=student.id)
+    crud.quiz_attempt.get_multi_scores(db, ids=[attempt.id])
+    crud.quiz_attempt.get_score(db, id=attempt.id)
+    crud.quiz_attempt.get_multi_score_drift(db, quiz_id=quiz.id)
+
+    crud.quiz_answer.grade(db, choice_id=choice.id)
+    crud.quiz_answer.get_by_question_and_attempt_ids(
+        db, question_id=question.id, attempt_id=attempt.id
+    )
+    crud.quiz_answer.get_all_by_attempt(db, attempt_id=attempt.id)
+    crud.quiz_answer.get_multi_by_attempt_ids(db, attempt_ids=[attempt.id])
+
+
+def test_crud_quiz_uses_indexes(db: Session) -> None:
+    quiz, questions = create_quiz()
+    student = UserFactory(is_student=True)
+    attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+    answer_quiz(quiz, attempt, student, questions)
+    question = questions[0]
+
+    with capture_selects(db) as statements:
+        call_crud_quiz_methods(
+            db,
+            quiz=quiz,
+            question=question,
+            choice=question.choices[0],
+            attempt=attempt,
+            student=student,
+        )
+
+    assert statements
+    assert full_scans(db, statements) == []
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URI"), reason="TEST_POSTGRES_URI is not set"
+)
+def test_crud_quiz_uses_indexes_postgres() -> None:
+    engine = create_engine(os.environ["TEST_POSTGRES_URI"])
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as pg_db, use_session(pg_db):
+            quiz, questions = create_quiz()
+            student = UserFactory(is_student=True)
+            attempt = AttemptFactory(quiz=quiz, student=student, recent_question=None)
+            answer_quiz(quiz, attempt, student, questions)
+            question = questions[0]
+
+            with capture_selects(pg_db) as statements:
+                call_crud_quiz_methods(
+                    pg_db,
+                    quiz=quiz,
+                    question=question,
+                    choice=question.choices[0],
+                    attempt=attempt,
+                    student=student,
+                )
+
+            assert statements
+            assert full_scans(pg_db, statements) == []
+            pg_db.rollback()
+    finally:
+        SQLModel.metadata.drop_all(engine)
+        engine.dispose()
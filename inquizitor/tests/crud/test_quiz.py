@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import inspect
+from sqlmodel import Session
+
+from inquizitor import crud
+from inquizitor.tests.factories import AttemptFactory, UserFactory
+from inquizitor.tests.utils.utils import answer_quiz, capture_selects, create_quiz
+
+
+def test_get_multi_results_by_quiz_id(db: Session) -> None:
+    quiz, questions = create_quiz()
+    students = [UserFactory(is_student=True) for i in range(3)]
+    expected = {}
+    for student in students:
+        for i in range(2):  # only the latest attempt should be in the results
+            attempt = AttemptFactory(
+                quiz=quiz, student=student, recent_question=None, is_done=i == 0
+            )
+            expected[student.full_name] = (
+                attempt.id,
+                answer_quiz(quiz, attempt, student, questions),
+            )
+
+    results = crud.quiz.get_multi_results_by_quiz_id(db, id=quiz.id)
+
+    assert len(results) == len(students)
+    for result in results:
+        attempt_id, score = expected[result["participant_name"]]
+        assert result["score"] == score
+        assert len(result["answers"]) == len(questions)
+        assert {answer["attempt_id"] for answer in result["answers"]} == {attempt_id}
+        assert [question["id"] for question in result["questions"]] == [
+            question.id for question in questions
+        ]
+
+
+def test_question_and_choice_ownership(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=2)
+    other_quiz, other_questions = create_quiz(number_of_questions=1)
+    question = questions[0]
+    choice = question.choices[0]
+    other_question = other_questions[0]
+
+    assert crud.quiz.has_question(db, quiz_index=quiz.id, question_id=question.id)
+    assert not crud.quiz.has_question(
+        db, quiz_index=quiz.id, question_id=other_question.id
+    )
+    assert crud.quiz_question.get_by_quiz(db, id=question.id, quiz_id=quiz.id)
+    assert not crud.quiz_question.get_by_quiz(db, id=other_question.id, quiz_id=quiz.id)
+
+    assert crud.quiz_question.has_choice(
+        db, question_id=question.id, choice_id=choice.id
+    )
+    assert not crud.quiz_question.has_choice(
+        db, question_id=other_question.id, choice_id=choice.id
+    )
+    assert crud.quiz_choice.get_by_question(db, id=choice.id, question_id=question.id)
+    assert not crud.quiz_choice.get_by_question(
+        db, id=choice.id, question_id=other_question.id
+    )
+
+
+def test_get_with_load_profile(db: Session) -> None:
+    quiz, questions = create_quiz(number_of_questions=3)
+    quiz_id = quiz.id
+    db.expunge_all()
+
+    with capture_selects(db) as statements:
+        quiz = crud.quiz.get(db, id=quiz_id, profile="quiz_with_questions_and_choices")
+        assert len(quiz.questions) == 3
+        assert all(len(question.choices) == 3 for question in quiz.questions)
+    assert len(statements) == 1
+
+    # loaded already, served from the session
+    with capture_selects(db) as statements:
+        crud.quiz.get(db, id=quiz.id, profile="quiz_with_questions")
+    assert statements == []
+
+    db.expire(quiz)
+    quiz = crud.quiz.get(db, id=quiz.id, profile="quiz_with_questions")
+    assert "questions" not in inspect(quiz).unloaded
+
+    with pytest.raises(ValueError):
+        crud.quiz.get(db, id=quiz.id, profile="question_with_choices")
+    with pytest.raises(ValueError):
+        crud.quiz.get_multi(db, profile="quiz_with_everything")
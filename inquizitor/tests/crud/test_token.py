@@ -0,0 +1,89 @@
+import os
+import time
+from alembic import command
+from alembic.config import Config
+from datetime import datetime, timedelta
+from sqlmodel import Session, create_engine, text
+
+from inquizitor import crud, models
+from inquizitor.core.config import settings
+from inquizitor.core.denylist import denylist
+from inquizitor.utils import fake
+
+
+def test_revoke_token(db: Session) -> None:
+    jti = fake.uuid4()
+    crud.token.revoke(db, jti=jti, exp=time.time() + 60)
+    assert jti in denylist
+
+    denylist.clear()
+    assert jti not in denylist
+    crud.token.load_denylist(db)
+    assert jti in denylist
+
+
+def test_is_revoked_elsewhere(db: Session) -> None:
+    jti, other_jti = fake.uuid4(), fake.uuid4()
+    assert not crud.token.is_revoked(db, jti=jti)
+    assert denylist.was_checked(jti) == bool(denylist.recheck)
+
+    # revoked by another process, straight into the database
+    db.add(models.RevokedToken(jti=other_jti))
+    db.commit()
+    assert crud.token.is_revoked(db, jti=other_jti)
+    assert other_jti in denylist
+
+
+def test_denylist_expiry() -> None:
+    jti = fake.uuid4()
+    denylist.add(jti, time.time() - 1)
+    assert jti not in denylist
+
+
+def test_purge_expired(db: Session) -> None:
+    expired = [fake.uuid4() for i in range(3)]
+    for jti in expired:
+        crud.token.revoke(db, jti=jti, exp=time.time() - 60)
+    unexpired = fake.uuid4()
+    crud.token.revoke(db, jti=unexpired, exp=time.time() + 60)
+
+    assert crud.token.purge_expired(db, chunk_size=2) >= len(expired)
+    jtis = [jti for jti, exp in crud.token.get_multi_unexpired(db)]
+    assert unexpired in jtis
+    assert not set(expired) & set(jtis)
+    assert (
+        not db.query(models.RevokedToken)
+        .filter(models.RevokedToken.jti.in_(expired))
+        .count()
+    )
+
+
+def test_revoke_without_expiry(db: Session) -> None:
+    db_obj = crud.token.revoke(db, jti=fake.uuid4())
+    lifetime = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    assert db_obj.expires_at > datetime.utcnow() + lifetime - timedelta(minutes=1)
+
+
+def test_legacy_revoked_token_expiry(tmp_path, monkeypatch) -> None:
+    """Tokens revoked before 0004 get an expiry, so they can be purged"""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    monkeypatch.setattr(settings, "SQLALCHEMY_DATABASE_URI", url)
+    config = Config()
+    config.set_main_option(
+        "script_location",
+        os.path.join(os.path.dirname(models.__file__), "..", "migrations"),
+    )
+    command.upgrade(config, "0003")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO revokedtoken (jti) VALUES ('legacy')"))
+
+    command.upgrade(config, "0004")
+    with engine.connect() as connection:
+        (expires_at,) = connection.execute(
+            text("SELECT expires_at FROM revokedtoken WHERE jti = 'legacy'")
+        ).one()
+    engine.dispose()
+    lifetime = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    expires_at = datetime.fromisoformat(expires_at)
+    assert expires_at > datetime.utcnow() + lifetime - timedelta(minutes=1)
@@ -4,7 +4,9 @@ from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session
 
 from inquizitor import crud, models
-from inquizitor.core.security import verify_password
+from inquizitor.core import security
+from inquizitor.core.security import set_bcrypt_rounds, verify_password
+from inquizitor.crud.base import get_identity_cache_stats
 from inquizitor.models.user import UserCreate, UserUpdate
 from inquizitor.utils import fake
 from inquizitor.tests.factories import UserFactory
@@ -27,6 +29,47 @@ def test_authenticate_user(db: Session) -> None:
     assert user_in["username"] == authenticated_user.username
 
 
+def test_authenticate_user_rehash(db: Session) -> None:
+    user_in = UserFactory.stub(schema_type="create")
+    user = crud.user.create(db, obj_in=UserCreate(**user_in))
+    old_hash = user.hashed_password
+
+    set_bcrypt_rounds(5)
+    try:
+        authenticated_user = crud.user.authenticate(
+            db, username=user_in["username"], password=user_in["password"]
+        )
+    finally:
+        set_bcrypt_rounds(4)
+
+    assert authenticated_user
+    assert authenticated_user.hashed_password != old_hash
+    assert authenticated_user.hashed_password.startswith("$2b$05$")
+    assert verify_password(user_in["password"], authenticated_user.hashed_password)
+
+
+def test_password_hash_process_pool(monkeypatch) -> None:
+    process_hasher = security.PasswordHasher(
+        max_workers=1, max_queue=0, use_processes=True
+    )
+    monkeypatch.setattr(security, "hasher", process_hasher)
+    try:
+        # the worker process starts with the current rounds
+        assert security.get_password_hash("password").startswith("$2b$04$")
+        set_bcrypt_rounds(5)
+        try:
+            hashed_password = security.get_password_hash("password")
+        finally:
+            set_bcrypt_rounds(4)
+        assert hashed_password.startswith("$2b$05$")
+        verified, new_hash = security.verify_and_update_password(
+            "password", hashed_password
+        )
+        assert verified and new_hash.startswith("$2b$04$")
+    finally:
+        process_hasher.shutdown()
+
+
 def test_not_authenticate_user(db: Session) -> None:
     user_in = UserFactory.stub(schema_type="create")
     user = crud.user.authenticate(
@@ -66,3 +109,30 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.username == user_2.username
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_get_user_identity_cache(db: Session) -> None:
+    user = UserFactory()
+    db.refresh(user)
+    id = user.id
+    stats = get_identity_cache_stats(db)
+    hits, misses = stats["hits"], stats["misses"]
+
+    user_2 = crud.user.get(db, id=id)
+    assert user_2 is user
+    assert stats["hits"] == hits + 1
+
+    db.expire(user)
+    crud.user.get(db, id=id)
+    assert stats["misses"] == misses + 1
+
+
+def test_get_user_snapshot(db: Session) -> None:
+    user = UserFactory()
+    snapshot = crud.user.get_snapshot(db, id=user.id)
+    assert snapshot.full_name == user.full_name
+    assert crud.user.get_snapshot(db, id=user.id) is snapshot
+
+    db.refresh(user)
+    crud.user.update(db, db_obj=user, obj_in={"password": None, "full_name": "New"})
+    assert crud.user.get_snapshot(db, id=user.id).full_name == "New"
@@ -1,6 +1,7 @@
 import datetime as dt
 import factory
 import random
+from contextlib import contextmanager
 from factory.alchemy import SQLAlchemyModelFactory
 from typing import List, Optional, Union
 
@@ -46,6 +47,26 @@ class BaseFactory(SQLAlchemyModelFactory):
         return jsonable_encoder(x)
 
 
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+@contextmanager
+def use_session(session):
+    """Create the objects of every factory in another session (database)"""
+    factories = list(_subclasses(BaseFactory))
+    previous = [factory._meta.sqlalchemy_session for factory in factories]
+    for factory in factories:
+        factory._meta.sqlalchemy_session = session
+    try:
+        yield session
+    finally:
+        for factory, previous_session in zip(factories, previous):
+            factory._meta.sqlalchemy_session = previous_session
+
+
 # TODO for update: check new attributes
 class UserFactory(BaseFactory):
     """User factory."""
@@ -53,8 +74,9 @@ class UserFactory(BaseFactory):
     class Meta:
         model = models.User
 
-    username = factory.Faker("user_name")
-    email = factory.Faker("email")
+    # numbered, Faker repeats itself over the hundreds of users the tests create
+    username = factory.Sequence(lambda n: f"{fake.user_name()}{n}")
+    email = factory.Sequence(lambda n: f"{n}{fake.email()}")
     full_name = factory.Faker("name")
     last_name = factory.Faker("last_name")
     first_name = factory.Faker("first_name")
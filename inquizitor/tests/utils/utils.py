@@ -1,13 +1,26 @@
 import logging
+import random
+import re
 import pytest
+from contextlib import contextmanager
 from httpx import AsyncClient
 from pprint import pformat
-from typing import Dict
+from sqlalchemy import event
+from sqlmodel import Session
+from typing import Dict, Tuple
 
 from fastapi import FastAPI
 from fastapi.encoders import jsonable_encoder
 
+from inquizitor import models
 from inquizitor.core.config import settings
+from inquizitor.tests.factories import (
+    AnswerFactory,
+    ChoiceFactory,
+    QuestionFactory,
+    QuizFactory,
+    UserFactory,
+)
 
 logging.basicConfig(level=logging.INFO)
 
@@ -46,3 +59,67 @@ async def get_teacher_cookies(app: FastAPI) -> Dict[str, str]:
     async with AsyncClient(app=app, base_url="http://test") as ac:
         r = await ac.post("/login/token", data=login_data)
     return r.cookies
+
+
+async def login(client: AsyncClient, **kwargs) -> Tuple[models.User, Dict[str, str]]:
+    """Create a user with the given attributes, return it and its cookies"""
+    user_in = UserFactory.stub(schema_type="create", **kwargs)
+    user = UserFactory(**user_in)
+    r = await client.post(
+        "/login/token",
+        data={"username": user_in["username"], "password": user_in["password"]},
+    )
+    return user, r.cookies
+
+
+def create_quiz(number_of_questions: int = 5):
+    quiz = QuizFactory()
+    questions = []
+    for i in range(number_of_questions):
+        question = QuestionFactory(quiz=quiz)
+        index_correct = random.randrange(0, 3)
+        for j in range(3):
+            ChoiceFactory(question=question, is_correct=j == index_correct)
+        questions.append(question)
+    return quiz, questions
+
+
+def answer_quiz(quiz, attempt, student, questions):
+    """Answer every question of the quiz randomly and return the expected score."""
+    score = 0
+    for question in questions:
+        choice = random.choice(question.choices)
+        AnswerFactory(
+            choice=choice,
+            student=student,
+            attempt=attempt,
+            question=question,
+            is_correct=False,
+        )
+        if choice.is_correct:
+            score += question.points
+    return score
+
+
+@contextmanager
+def capture_selects(db: Session):
+    statements = []
+    engine = db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def get_query_count(response) -> int:
+    """Statements the request ran, from its Server-Timing header"""
+    match = re.search(
+        r'db;[^,]*desc="(\d+) queries"', response.headers["server-timing"]
+    )
+    return int(match.group(1))